@@ -0,0 +1,280 @@
+# backend/app/cache.py
+import os
+import json
+from collections import namedtuple
+from functools import lru_cache
+
+import redis
+from dotenv import load_dotenv
+from sqlalchemy.orm import Session
+
+from . import models
+
+load_dotenv()
+
+REDIS_URL = os.getenv("REDIS_URL")
+USER_CACHE_TTL_SECS = int(os.getenv("USER_CACHE_TTL_SECS", "300"))
+ANSWER_BUFFER_TTL_SECS = int(os.getenv("ANSWER_BUFFER_TTL_SECS", "86400"))
+EXAM_CACHE_TTL_SECS = int(os.getenv("EXAM_CACHE_TTL_SECS", "86400"))
+
+
+# -------------------------------------------------
+# Redis client
+# -------------------------------------------------
+@lru_cache(maxsize=1)
+def get_redis():
+    """
+    Shared Redis client, or None when REDIS_URL is not set.
+    Callers treat Redis as optional and fall back to Postgres.
+    """
+    if not REDIS_URL:
+        return None
+
+    return redis.Redis.from_url(
+        REDIS_URL,
+        decode_responses=True,
+        socket_timeout=0.5
+    )
+
+
+# -------------------------------------------------
+# User lookup cache (email -> profile)
+# -------------------------------------------------
+CachedUser = namedtuple("CachedUser", ["id", "email", "name", "is_admin"])
+
+
+def _user_key(email: str):
+    return f"user:{email}"
+
+
+def get_db_user(db: Session, email: str):
+    """
+    Resolve a JWT email to the user's id / role, cached for
+    USER_CACHE_TTL_SECS. Returns a CachedUser or None.
+    """
+    if not email:
+        return None
+
+    r = get_redis()
+
+    if r is not None:
+        try:
+            raw = r.get(_user_key(email))
+        except redis.RedisError:
+            raw = None
+
+        if raw:
+            return CachedUser(**json.loads(raw))
+
+    user = db.query(models.User).filter(
+        models.User.email == email
+    ).first()
+
+    if not user:
+        return None
+
+    cached = CachedUser(user.id, user.email, user.name, user.is_admin)
+
+    if r is not None:
+        try:
+            r.setex(_user_key(email), USER_CACHE_TTL_SECS, json.dumps(cached._asdict()))
+        except redis.RedisError:
+            pass
+
+    return cached
+
+
+def invalidate_user(email: str):
+    r = get_redis()
+    if r is None:
+        return
+
+    try:
+        r.delete(_user_key(email))
+    except redis.RedisError:
+        pass
+
+
+# -------------------------------------------------
+# Exam content cache (exam_id -> title, time limit + questions)
+# Only content that never changes once generated is cached; mutable
+# fields like is_active are always read from Postgres.
+# -------------------------------------------------
+def _exam_key(exam_id: str):
+    return f"exam:{exam_id}"
+
+
+def get_cached_exam(exam_id: str):
+    r = get_redis()
+    if r is None:
+        return None
+
+    try:
+        raw = r.get(_exam_key(exam_id))
+    except redis.RedisError:
+        return None
+
+    return json.loads(raw) if raw else None
+
+
+def cache_exam(exam_id: str, content: dict):
+    r = get_redis()
+    if r is None:
+        return
+
+    try:
+        r.setex(_exam_key(exam_id), EXAM_CACHE_TTL_SECS, json.dumps(content))
+    except redis.RedisError:
+        pass
+
+
+# -------------------------------------------------
+# Answer write buffer (flushed to Postgres by the worker)
+#   ce:{candidate_exam_id}:{user_id}:ok  ownership verified by a DB write
+#   ce:{candidate_exam_id}:{user_id}:a   hash question_id -> selected_index
+#   ce:{candidate_exam_id}:{user_id}:t   latest time_elapsed
+# -------------------------------------------------
+def _answer_keys(candidate_exam_id: str, user_id: str):
+    base = f"ce:{candidate_exam_id}:{user_id}"
+    return f"{base}:ok", f"{base}:a", f"{base}:t"
+
+
+def mark_answer_buffer(candidate_exam_id: str, user_id: str):
+    """
+    Allow buffered saves for this exam/user pair.
+    Only call after the pair has been verified against Postgres.
+    """
+    r = get_redis()
+    if r is None:
+        return
+
+    ok_key, _, _ = _answer_keys(candidate_exam_id, user_id)
+    try:
+        r.set(ok_key, 1, ex=ANSWER_BUFFER_TTL_SECS)
+    except redis.RedisError:
+        pass
+
+
+def buffer_answers(candidate_exam_id: str, user_id: str, patch: dict, time_elapsed=None) -> bool:
+    """
+    Stage answers in Redis. Returns False when the caller must write to
+    Postgres instead (no Redis, Redis error, or pair not verified yet).
+    """
+    r = get_redis()
+    if r is None:
+        return False
+
+    ok_key, answers_key, time_key = _answer_keys(candidate_exam_id, user_id)
+
+    try:
+        if not r.exists(ok_key):
+            return False
+
+        pipe = r.pipeline()
+        if patch:
+            pipe.hset(answers_key, mapping={k: json.dumps(v) for k, v in patch.items()})
+            pipe.expire(answers_key, ANSWER_BUFFER_TTL_SECS)
+        if time_elapsed is not None:
+            pipe.set(time_key, time_elapsed, ex=ANSWER_BUFFER_TTL_SECS)
+        pipe.execute()
+
+    except redis.RedisError:
+        return False
+
+    return True
+
+
+def pop_buffered_answers(candidate_exam_id: str, user_id: str):
+    """
+    Atomically read and clear the buffer (MULTI/EXEC).
+    Returns (patch, time_elapsed); empty when nothing is staged.
+    """
+    r = get_redis()
+    if r is None:
+        return {}, None
+
+    _, answers_key, time_key = _answer_keys(candidate_exam_id, user_id)
+
+    try:
+        pipe = r.pipeline()
+        pipe.hgetall(answers_key)
+        pipe.get(time_key)
+        pipe.delete(answers_key, time_key)
+        raw, elapsed, _ = pipe.execute()
+    except redis.RedisError:
+        return {}, None
+
+    # The keys are gone now: parse defensively so one bad value can't
+    # throw away the rest of the popped answers
+    patch = {}
+    for k, v in raw.items():
+        try:
+            patch[k] = json.loads(v)
+        except ValueError:
+            print(f"❌ Dropped unreadable buffered answer {candidate_exam_id}/{k}: {v!r}")
+
+    return patch, _parse_elapsed(candidate_exam_id, elapsed)
+
+
+def _parse_elapsed(candidate_exam_id: str, elapsed):
+    if elapsed is None:
+        return None
+
+    try:
+        return round(float(elapsed))
+    except (ValueError, OverflowError):
+        print(f"❌ Dropped unreadable buffered time for {candidate_exam_id}: {elapsed!r}")
+        return None
+
+
+def restore_buffered_answers(candidate_exam_id: str, user_id: str, patch: dict, time_elapsed=None):
+    """
+    Put popped answers back after a failed flush, without overwriting
+    anything the candidate saved in the meantime.
+    """
+    r = get_redis()
+    if r is None:
+        return
+
+    _, answers_key, time_key = _answer_keys(candidate_exam_id, user_id)
+
+    try:
+        pipe = r.pipeline()
+        for k, v in patch.items():
+            pipe.hsetnx(answers_key, k, json.dumps(v))
+        pipe.expire(answers_key, ANSWER_BUFFER_TTL_SECS)
+        if time_elapsed is not None:
+            pipe.set(time_key, time_elapsed, ex=ANSWER_BUFFER_TTL_SECS, nx=True)
+        pipe.execute()
+    except redis.RedisError:
+        print(f"❌ Lost buffered answers for {candidate_exam_id}: {patch}")
+
+
+def clear_answer_buffer(candidate_exam_id: str, user_id: str):
+    """Stop buffering for this pair (e.g. once the exam is submitted)."""
+    r = get_redis()
+    if r is None:
+        return
+
+    try:
+        r.delete(*_answer_keys(candidate_exam_id, user_id))
+    except redis.RedisError:
+        pass
+
+
+def buffered_answer_exams():
+    """Set of (candidate_exam_id, user_id) pairs with staged writes."""
+    r = get_redis()
+    if r is None:
+        return set()
+
+    pairs = set()
+    try:
+        for key in r.scan_iter(match="ce:*", count=500):
+            _, candidate_exam_id, user_id, kind = key.split(":", 3)
+            if kind in ("a", "t"):
+                pairs.add((candidate_exam_id, user_id))
+    except redis.RedisError:
+        pass
+
+    return pairs
@@ -0,0 +1,62 @@
+# backend/app/cognito_admin.py
+import os
+from functools import lru_cache
+
+import boto3
+from dotenv import load_dotenv
+
+load_dotenv()
+
+AWS_REGION = os.getenv("AWS_REGION")
+COGNITO_USER_POOL_ID = os.getenv("COGNITO_USER_POOL_ID")
+default_password = os.getenv("DEFAULT_PASSWORD")
+
+
+@lru_cache(maxsize=1)
+def cognito_client():
+    # boto3 clients are thread-safe; build one lazily and share it
+    return boto3.client(
+        "cognito-idp",
+        region_name=AWS_REGION
+    )
+
+
+def create_cognito_user(cognito, email: str) -> bool:
+    """
+    Create a candidate in the user pool with the default password.
+    Returns True if the default password was set here, False if the
+    user already had an account of their own.
+    """
+    try:
+        cognito.admin_create_user(
+            UserPoolId=COGNITO_USER_POOL_ID,
+            Username=email,
+            UserAttributes=[
+                {"Name": "email", "Value": email},
+                {"Name": "email_verified", "Value": "true"}
+            ],
+            MessageAction="SUPPRESS"
+        )
+
+    except cognito.exceptions.UsernameExistsException:
+        # A previous attempt may have created the account and then failed
+        # to set the password; those accounts are still FORCE_CHANGE_PASSWORD.
+        # Anyone else keeps the password they already have.
+        user = cognito.admin_get_user(
+            UserPoolId=COGNITO_USER_POOL_ID,
+            Username=email
+        )
+
+        if user.get("UserStatus") != "FORCE_CHANGE_PASSWORD":
+            print(f"⚠️ Cognito user already exists: {email}")
+            return False
+
+    cognito.admin_set_user_password(
+        UserPoolId=COGNITO_USER_POOL_ID,
+        Username=email,
+        Password=default_password,
+        Permanent=True
+    )
+
+    print(f"✅ Cognito user ready: {email}")
+    return True
@@ -1,7 +1,13 @@
 # backend/app/cognito_auth.py
 import os
+import re
+import time
+import threading
+from collections import OrderedDict
+from hashlib import blake2b
 import requests
-from jose import jwt
+from requests.adapters import HTTPAdapter
+import jwt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 
@@ -12,13 +18,184 @@ CLIENT_ID = os.getenv("COGNITO_CLIENT_ID")
 if not AWS_REGION or not USER_POOL_ID or not CLIENT_ID:
     raise RuntimeError("Cognito environment variables not set")
 
-JWKS_URL = (
-    f"https://cognito-idp.{AWS_REGION}.amazonaws.com/"
-    f"{USER_POOL_ID}/.well-known/jwks.json"
-)
+_ISSUER = f"https://cognito-idp.{AWS_REGION}.amazonaws.com/{USER_POOL_ID}"
+
+JWKS_URL = f"{_ISSUER}/.well-known/jwks.json"
 
 security = HTTPBearer()
-jwks = requests.get(JWKS_URL).json()
+
+# Admins: members of this Cognito group, or anyone on the NMK domain
+ADMIN_GROUP = os.getenv("COGNITO_ADMIN_GROUP", "admin")
+ADMIN_EMAIL_DOMAIN = "@nmkglobalinc.com"
+
+
+def _is_admin(payload: dict) -> bool:
+    if ADMIN_GROUP in payload.get("cognito:groups", []):
+        return True
+
+    # Only trust the domain once Cognito has verified the address
+    # (ID tokens carry email_verified as a bool or "true")
+    return (
+        payload.get("email_verified") in (True, "true")
+        and (payload.get("email") or "").endswith(ADMIN_EMAIL_DOMAIN)
+    )
+
+
+# -------------------------------------------------
+# JWKS cache (kid -> prepared public key), refreshed lazily
+# -------------------------------------------------
+JWKS_TTL_SECS = int(os.getenv("JWKS_TTL_SECS", "600"))
+
+# An unknown kid may force a refresh at most this often
+JWKS_MIN_REFRESH_SECS = int(os.getenv("JWKS_MIN_REFRESH_SECS", "30"))
+
+_MAX_AGE_RE = re.compile(r"max-age=(\d+)")
+
+# Keep-alive session so periodic refreshes reuse the TLS connection
+_jwks_session = requests.Session()
+_jwks_session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=2))
+_jwks_session.headers.update({
+    "User-Agent": "nmk-cert-portal/jwks",
+    "Accept-Encoding": "gzip",
+})
+
+_jwks_keys: dict[str, object] = {}
+_jwks_expires_at: float = 0.0
+_jwks_fetched_at: float = float("-inf")
+_jwks_lock = threading.Lock()
+
+# Header segment -> parsed header. Every token issued by the pool carries
+# one of a handful of identical headers, so each is only parsed once.
+_HEADER_CACHE_MAX = 64
+_header_cache: dict[str, dict] = {}
+
+
+# -------------------------------------------------
+# Verified token cache (digest -> payload), LRU bounded
+# -------------------------------------------------
+TOKEN_CACHE_MAX = int(os.getenv("TOKEN_CACHE_MAX", "4096"))
+
+_token_cache: "OrderedDict[bytes, dict]" = OrderedDict()
+_token_cache_lock = threading.Lock()
+
+
+def _token_digest(token: str):
+    return blake2b(token.encode(), digest_size=16).digest()
+
+
+def _get_cached_payload(digest: bytes):
+    with _token_cache_lock:
+        payload = _token_cache.get(digest)
+        if payload is None:
+            return None
+
+        if payload["exp"] <= time.time():
+            del _token_cache[digest]
+            return None
+
+        _token_cache.move_to_end(digest)
+        return payload
+
+
+def _cache_payload(digest: bytes, payload: dict):
+    if "exp" not in payload:
+        return
+
+    with _token_cache_lock:
+        _token_cache[digest] = payload
+        _token_cache.move_to_end(digest)
+        if len(_token_cache) > TOKEN_CACHE_MAX:
+            _token_cache.popitem(last=False)
+
+
+def _refresh_jwks():
+    global _jwks_keys, _jwks_expires_at, _jwks_fetched_at
+
+    response = _jwks_session.get(JWKS_URL, timeout=3)
+    response.raise_for_status()
+
+    ttl = JWKS_TTL_SECS
+    match = _MAX_AGE_RE.search(response.headers.get("Cache-Control", ""))
+    if match:
+        # max-age=0 would mean a fetch (under _jwks_lock) on every request
+        ttl = max(int(match.group(1)), JWKS_MIN_REFRESH_SECS)
+
+    # Build the RSAPublicKey objects once here instead of on every decode
+    _jwks_keys = {
+        k["kid"]: jwt.PyJWK(k, "RS256").key
+        for k in response.json()["keys"]
+    }
+    _jwks_fetched_at = time.monotonic()
+    _jwks_expires_at = _jwks_fetched_at + ttl
+
+    # Keys may have been revoked; re-verify everything against the new set
+    with _token_cache_lock:
+        _token_cache.clear()
+
+
+def _jwks_refresh_failed(error):
+    """
+    Keep serving the keys we already have and back off before the next
+    fetch, so a JWKS outage doesn't 401 everyone or queue requests
+    behind a 3s fetch each.
+    """
+    global _jwks_expires_at, _jwks_fetched_at
+
+    print(f"❌ JWKS refresh failed, keeping {len(_jwks_keys)} cached keys: {error}")
+
+    _jwks_fetched_at = time.monotonic()
+    _jwks_expires_at = _jwks_fetched_at + JWKS_MIN_REFRESH_SECS
+
+
+def _needs_refresh(key):
+    now = time.monotonic()
+    if now >= _jwks_expires_at:
+        return True
+    return key is None and now - _jwks_fetched_at >= JWKS_MIN_REFRESH_SECS
+
+
+def _get_key(kid: str):
+    """Return the public key for kid, or None if the pool has no such key."""
+    key = _jwks_keys.get(kid)
+    if not _needs_refresh(key):
+        return key
+
+    with _jwks_lock:
+        # Another thread may have refreshed while we waited
+        key = _jwks_keys.get(kid)
+        if _needs_refresh(key):
+            try:
+                _refresh_jwks()
+            except Exception as e:
+                _jwks_refresh_failed(e)
+            key = _jwks_keys.get(kid)
+
+    return key
+
+
+def _get_header(token: str):
+    segment = token.partition(".")[0]
+
+    header = _header_cache.get(segment)
+    if header is None:
+        header = jwt.get_unverified_header(token)
+
+        # Only cache headers we accept, so junk tokens can't fill the cache
+        if (
+            header.get("alg") == "RS256"
+            and header.get("kid") in _jwks_keys
+            and len(_header_cache) < _HEADER_CACHE_MAX
+        ):
+            _header_cache[segment] = header
+
+    return header
+
+
+def _unauthorized():
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid or expired token",
+    )
 
 
 def get_current_user(
@@ -26,22 +203,40 @@ def get_current_user(
 ):
     token = credentials.credentials
 
+    # ⚡ Same token seen recently and still unexpired: skip the RSA verify
+    digest = _token_digest(token)
+    payload = _get_cached_payload(digest)
+    if payload is not None:
+        return payload
+
     try:
-        header = jwt.get_unverified_header(token)
-        key = next(k for k in jwks["keys"] if k["kid"] == header["kid"])
+        header = _get_header(token)
+
+        # Fast reject: wrong algorithm or unknown signing key, no RSA verify
+        if header.get("alg") != "RS256":
+            raise _unauthorized()
+
+        key = _get_key(header.get("kid"))
+        if key is None:
+            raise _unauthorized()
 
         payload = jwt.decode(
             token,
             key,
             algorithms=["RS256"],
             audience=CLIENT_ID,
-            issuer=f"https://cognito-idp.{AWS_REGION}.amazonaws.com/{USER_POOL_ID}",
+            issuer=_ISSUER,
         )
 
+        # 👑 Role comes from the token, no DB lookup needed
+        payload["is_admin"] = _is_admin(payload)
+
+        _cache_payload(digest, payload)
+
         return payload  # Cognito user info
 
+    except HTTPException:
+        raise
+
     except Exception:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid or expired token",
-        )
+        raise _unauthorized()
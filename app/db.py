@@ -1,6 +1,7 @@
 # backend/app/db.py
 
 from sqlalchemy import create_engine
+from sqlalchemy.pool import NullPool
 from sqlalchemy.orm import sessionmaker, declarative_base
 import os
 from dotenv import load_dotenv
@@ -13,7 +14,31 @@ SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL")
 if not SQLALCHEMY_DATABASE_URL:
     raise RuntimeError("DATABASE_URL not found. Check your .env file.")
 
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
+# Connection pool (tunable per deployment)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "25"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "25"))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+
+# Behind PgBouncer (transaction pooling) let the bouncer own the pool
+DB_USE_NULLPOOL = os.getenv("DB_USE_NULLPOOL") == "1"
+
+if DB_USE_NULLPOOL:
+    pool_args = {"poolclass": NullPool}
+else:
+    pool_args = {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": True,
+    }
+
+engine = create_engine(
+    SQLALCHEMY_DATABASE_URL,
+    echo_pool=os.getenv("DB_ECHO_POOL") == "1",
+    **pool_args
+)
 
 SessionLocal = sessionmaker(
     autocommit=False,
@@ -20,20 +20,12 @@ print("🔍 EMAIL_FROM:", EMAIL_FROM)
 print("🔍 EMAIL_PASSWORD LOADED:", bool(EMAIL_PASSWORD))
 
 
-def send_exam_assignment_email(to_email: str, exam_title: str, send_password=False):
-    print("📧 send_exam_assignment_email() CALLED")
+# Max messages sent over one SMTP connection before reconnecting
+EMAIL_BATCH_SIZE = int(os.getenv("EMAIL_BATCH_SIZE", "50"))
 
-    msg = EmailMessage()
-    msg["Subject"] = "NMK Certification Exam Assigned"
-    msg["From"] = EMAIL_FROM
-    msg["To"] = to_email
-
-    if send_password:
-        password_section = f"\nTemporary Password: {default_password}\n"
-    else:
-        password_section = "\nPlease use your existing password to login.\n"
 
-    msg.set_content(f"""
+# Assignment email body, built once at import; each message is one .format()
+_ASSIGNMENT_BODY = """
         Hello,
 
         You have been assigned a new exam.
@@ -44,22 +36,62 @@ def send_exam_assignment_email(to_email: str, exam_title: str, send_password=Fal
         {password_section}
 
         🔗 Portal:
-        {PORTAL_URL}
+        {portal_url}
 
         Regards,
         NMK Certification Team
         """
-    )
-    try:
-        print("📡 Connecting to Gmail SMTP...")
-        with smtplib.SMTP(SMTP_SERVER, SMTP_PORT) as server:
-            server.set_debuglevel(1)   # 🔥 VERY IMPORTANT
-            server.starttls()
-            print("🔐 Logging in to Gmail...")
-            server.login(EMAIL_FROM, EMAIL_PASSWORD)
-            print("✉️ Sending email...")
-            server.send_message(msg)
-            print("✅ EMAIL SENT SUCCESSFULLY")
-    except Exception as e:
-        print("❌ SMTP ERROR:", e)
-        raise
+
+_PASSWORD_SECTIONS = {
+    True: f"\nTemporary Password: {default_password}\n",
+    False: "\nPlease use your existing password to login.\n",
+}
+
+
+def _build_assignment_message(to_email: str, exam_title: str, send_password=False):
+    msg = EmailMessage()
+    msg["Subject"] = "NMK Certification Exam Assigned"
+    msg["From"] = EMAIL_FROM
+    msg["To"] = to_email
+
+    msg.set_content(_ASSIGNMENT_BODY.format(
+        exam_title=exam_title,
+        to_email=to_email,
+        password_section=_PASSWORD_SECTIONS[bool(send_password)],
+        portal_url=PORTAL_URL
+    ))
+    return msg
+
+
+def send_exam_assignment_emails(recipients, exam_title: str):
+    """
+    Send assignment emails to many candidates.
+    recipients: list of (to_email, send_password) tuples.
+    One SMTP connection + login is reused for up to EMAIL_BATCH_SIZE messages.
+    Returns the list of emails that were sent; failures are logged, not raised.
+    """
+    sent = []
+
+    for start in range(0, len(recipients), EMAIL_BATCH_SIZE):
+        batch = recipients[start:start + EMAIL_BATCH_SIZE]
+
+        try:
+            print(f"📡 Connecting to Gmail SMTP for {len(batch)} emails...")
+            with smtplib.SMTP(SMTP_SERVER, SMTP_PORT) as server:
+                server.starttls()
+                server.login(EMAIL_FROM, EMAIL_PASSWORD)
+
+                for to_email, send_password in batch:
+                    try:
+                        server.send_message(
+                            _build_assignment_message(to_email, exam_title, send_password)
+                        )
+                        sent.append(to_email)
+                    except smtplib.SMTPRecipientsRefused as e:
+                        print(f"❌ Email failed for {to_email}: {e}")
+
+        except Exception as e:
+            print("❌ SMTP ERROR:", e)
+
+    print(f"✅ {len(sent)}/{len(recipients)} EMAILS SENT")
+    return sent
@@ -1,55 +1,230 @@
 # backend/app/exam.py
 from typing import List
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
-from .models import Question, CandidateExam
+from sqlalchemy import and_, insert, update, func, literal, text
+from sqlalchemy.dialects.postgresql import JSONB, insert as pg_insert
+from .models import Question, CandidateExam, Exam, ExamAssignment, User, gen_id
+from .cache import get_redis, pop_buffered_answers, restore_buffered_answers, get_cached_exam, cache_exam
 from datetime import datetime
 
+
+def _bulk_insert(db: Session, model, rows: List[dict]):
+    """
+    Insert many rows with one executemany INSERT.
+    IDs are filled in client-side so callers can use them before commit.
+    """
+    if not rows:
+        return []
+
+    for row in rows:
+        row.setdefault("id", gen_id())
+
+    db.execute(insert(model), rows)
+    return [row["id"] for row in rows]
+
+
+def bulk_create_questions(db: Session, rows: List[dict]):
+    return _bulk_insert(db, Question, rows)
+
+
+def bulk_create_assignments(db: Session, rows: List[dict]):
+    """
+    Insert assignments in one statement, skipping (exam_id, candidate_email)
+    pairs that already exist. Returns the emails that were newly assigned.
+    """
+    if not rows:
+        return []
+
+    for row in rows:
+        row.setdefault("id", gen_id())
+
+    stmt = (
+        pg_insert(ExamAssignment)
+        .values(rows)
+        .on_conflict_do_nothing(index_elements=["exam_id", "candidate_email"])
+        .returning(ExamAssignment.candidate_email)
+    )
+    return list(db.execute(stmt).scalars())
+
+
+def bulk_create_users(db: Session, rows: List[dict]):
+    return _bulk_insert(db, User, rows)
+
+
+def load_questions(db: Session, question_ids) -> List[Question]:
+    """
+    Fetch questions with one IN (...) query, returned in question_ids order.
+    Unknown ids are skipped.
+    """
+    if not question_ids:
+        return []
+
+    rows = db.query(Question).filter(Question.id.in_(question_ids)).all()
+    by_id = {q.id: q for q in rows}
+
+    return [by_id[qid] for qid in question_ids if qid in by_id]
+
+
+def get_exam_content(db: Session, exam_id: str):
+    """
+    Immutable exam content (title, time limit, questions without answers)
+    as a plain dict, served from Redis when cached. Returns None if the
+    exam does not exist.
+    """
+    cached = get_cached_exam(exam_id)
+    if cached is not None:
+        return cached
+
+    exam_obj = db.query(Exam).filter(Exam.id == exam_id).first()
+    if not exam_obj:
+        return None
+
+    questions = db.query(Question).filter(Question.exam_id == exam_id).all()
+
+    content = {
+        "id": exam_obj.id,
+        "title": exam_obj.title,
+        "language": exam_obj.language,
+        "time_allowed_secs": exam_obj.time_allowed_secs,
+        "questions": [
+            {"id": q.id, "text": q.text, "choices": q.choices}
+            for q in questions
+        ]
+    }
+
+    # Pending / failed exams have no question set worth caching yet
+    if exam_obj.status == "ready":
+        cache_exam(exam_id, content)
+
+    return content
+
+
+def attempt_questions(db: Session, candidate_exam: CandidateExam) -> List[dict]:
+    """
+    Questions for an attempt, in its question_ids order, as
+    {id, text, choices} dicts. Uses the cached exam content when present.
+    """
+    question_ids = candidate_exam.question_ids or []
+
+    cached = get_cached_exam(candidate_exam.exam_id)
+    if cached is not None:
+        by_id = {q["id"]: q for q in cached["questions"]}
+        return [by_id[qid] for qid in question_ids if qid in by_id]
+
+    return [
+        {"id": q.id, "text": q.text, "choices": q.choices}
+        for q in load_questions(db, question_ids)
+    ]
+
+
+def merge_answers(db: Session, candidate_exam_id: str, user_id: str, patch: dict,
+                  time_elapsed=None, in_progress_only=False) -> bool:
+    """
+    Merge {question_id: selected_index} into CandidateExam.answers with one
+    UPDATE (answers || patch) instead of reading and rewriting the whole dict.
+    in_progress_only skips attempts that were already submitted.
+    Returns False if no exam matched the id/user.
+    """
+    values = {
+        "answers": func.coalesce(CandidateExam.answers, literal({}, JSONB)).op("||")(
+            literal(patch, JSONB)
+        )
+    }
+    if time_elapsed is not None:
+        values["time_elapsed"] = time_elapsed
+
+    conditions = [
+        CandidateExam.id == candidate_exam_id,
+        CandidateExam.user_id == user_id
+    ]
+    if in_progress_only:
+        conditions.append(CandidateExam.status == "in_progress")
+
+    result = db.execute(
+        update(CandidateExam)
+        .where(*conditions)
+        .values(**values)
+        .returning(CandidateExam.id)
+        .execution_options(synchronize_session=False)
+    )
+    return result.first() is not None
+
+
+def flush_answers(db: Session, candidate_exam_id: str, user_id: str, commit=True):
+    """
+    Write answers staged in Redis to Postgres.
+
+    The attempt row is locked (SELECT ... FOR UPDATE) before the buffer is
+    popped, so the beat flush and /submit can't interleave: whichever comes
+    second waits, then sees the other's writes. Buffered data never lands
+    on an attempt that is no longer in progress.
+
+    With commit=False the caller keeps the lock and must commit (and call
+    restore_buffered_answers with the returned data if that fails).
+    Returns the flushed (patch, time_elapsed), or None if nothing was staged.
+    """
+    # No Redis means nothing is ever staged
+    if get_redis() is None:
+        return None
+
+    locked = db.query(CandidateExam.id).filter(
+        CandidateExam.id == candidate_exam_id,
+        CandidateExam.user_id == user_id
+    ).with_for_update().first()
+
+    if locked is None:
+        if commit:
+            db.rollback()
+        return None
+
+    patch, time_elapsed = pop_buffered_answers(candidate_exam_id, user_id)
+
+    if not patch and time_elapsed is None:
+        if commit:
+            db.commit()
+        return None
+
+    try:
+        merge_answers(db, candidate_exam_id, user_id, patch, time_elapsed, in_progress_only=True)
+        if commit:
+            db.commit()
+    except Exception:
+        db.rollback()
+        restore_buffered_answers(candidate_exam_id, user_id, patch, time_elapsed)
+        raise
+
+    return patch, time_elapsed
+
+
+# Correct answers for one attempt, counted in Postgres: walk the attempt's
+# question_ids, join each to its question by PK, compare the stored answer.
+_SCORE_SQL = text("""
+    SELECT count(*)
+    FROM candidate_exams ce
+    CROSS JOIN LATERAL jsonb_array_elements_text(ce.question_ids) AS qid
+    JOIN questions q ON q.id = qid::uuid
+    WHERE ce.id = :candidate_exam_id
+      AND ce.answers -> qid = to_jsonb(q.answer_index)
+""")
+
+
 def compute_score(db: Session, candidate_exam: CandidateExam):
+    """
+    Score the attempt with one aggregate query over its stored answers.
+    Answers must already be written to the row (flush_answers first).
+    """
     if not candidate_exam.question_ids:
         return 0
-    
-    correct = 0
+
     total = len(candidate_exam.question_ids)
-    answers = candidate_exam.answers or {}
-    
-    print(f"\n{'='*60}")
-    print(f"COMPUTING SCORE")
-    print(f"{'='*60}")
-    print(f"Total questions: {total}")
-    print(f"Stored answers: {answers}")
-    print(f"{'='*60}\n")
-    
-    for qid in candidate_exam.question_ids:
-        q = db.query(Question).filter(Question.id == qid).first()
-        if not q:
-            print(f"⚠️ Question {qid} not found in database")
-            continue
-        
-        # ✅ Convert qid to string to match storage format
-        qid_str = str(qid)
-        sel = answers.get(qid_str)
-        
-        print(f"Question: {q.text[:50]}...")
-        print(f"  Question ID: {qid} → lookup key: '{qid_str}'")
-        print(f"  Selected: {sel}, Correct: {q.answer_index}")
-        
-        if sel is None:
-            print(f"  ❌ No answer recorded")
-            continue
-        
-        if sel == q.answer_index:
-            correct += 1
-            print(f"  ✅ CORRECT!")
-        else:
-            print(f"  ❌ WRONG!")
-        print("-" * 40)
-    
+
+    correct = db.execute(
+        _SCORE_SQL, {"candidate_exam_id": candidate_exam.id}
+    ).scalar()
+
     percent = int((correct / total) * 100) if total > 0 else 0
     candidate_exam.score = percent
-    
-    print(f"\n{'='*60}")
+
     print(f"FINAL SCORE: {correct}/{total} = {percent}%")
-    print(f"{'='*60}\n")
-    
-    return percent
\ No newline at end of file
+
+    return percent
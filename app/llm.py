@@ -0,0 +1,195 @@
+# backend/app/llm.py
+import asyncio
+import json
+import os
+import random
+import re
+import weakref
+
+import httpx
+import orjson
+
+LLM_API_URL = os.getenv("LLM_API_URL")
+
+LLM_CONCURRENCY = int(os.getenv("LLM_CONCURRENCY", "8"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+LLM_TIMEOUT_SECS = 90
+
+BATCH_SIZE = 10
+MAX_ATTEMPTS = 30
+
+
+# LLM RESPONSE PARSER
+
+_FENCE_RE = re.compile(r"```json|```", re.IGNORECASE)
+_JSON_DECODER = json.JSONDecoder()
+
+
+def _to_question(item):
+    if not isinstance(item, dict):
+        return None
+
+    q = item.get("Question")
+    opts = item.get("Options")
+    ans = item.get("Answer")
+
+    if not q or not opts or not ans:
+        return None
+
+    # A nested object (e.g. "Options": {"x": 1}) would pass as its keys
+    if not isinstance(opts, list):
+        return None
+
+    # First matching option wins, same as a linear scan would
+    option_index = {}
+    for i, opt in enumerate(opts):
+        option_index.setdefault(str(opt).strip(), i)
+
+    answer_index = option_index.get(str(ans).strip())
+
+    if answer_index is None:
+        return None
+
+    return {
+        "question": q,
+        "options": opts,
+        "answer_index": answer_index
+    }
+
+
+def parse_llm_response(raw_text: str):
+    if not raw_text:
+        return []
+
+    # Remove markdown fences
+    text = _FENCE_RE.sub("", raw_text).strip()
+
+    # Find array start
+    start = text.find("[")
+    if start == -1:
+        return []
+
+    # ⚡ Fast path: complete array parsed in one orjson call
+    end = text.rfind("]")
+    if end > start:
+        try:
+            items = orjson.loads(text[start:end + 1])
+        except orjson.JSONDecodeError:
+            items = None
+
+        if isinstance(items, list):
+            return [q for q in map(_to_question, items) if q is not None]
+
+    questions = []
+
+    # 🔥 Walk COMPLETE JSON OBJECTS ONLY (do NOT force closing ])
+    pos = text.find("{", start)
+
+    while pos != -1:
+        try:
+            item, end = _JSON_DECODER.raw_decode(text, pos)
+        except json.JSONDecodeError:
+            # Truncated / broken object: resync on the next brace
+            pos = text.find("{", pos + 1)
+            continue
+
+        pos = text.find("{", end)
+
+        question = _to_question(item)
+        if question is not None:
+            questions.append(question)
+
+    return questions
+
+
+# =========================
+# LLM API CALLS
+# =========================
+
+# One semaphore per event loop. generate_exam runs each exam in its own
+# asyncio.run(), so this bounds one exam's batches; the total across exams
+# is LLM_CONCURRENCY x the Celery worker's concurrency.
+_semaphores = weakref.WeakKeyDictionary()
+
+
+def _llm_semaphore():
+    loop = asyncio.get_running_loop()
+    sem = _semaphores.get(loop)
+    if sem is None:
+        sem = _semaphores[loop] = asyncio.Semaphore(LLM_CONCURRENCY)
+    return sem
+
+
+def _is_retryable(response: httpx.Response):
+    return (
+        response.status_code == 429
+        or response.status_code >= 500
+        or "rate limit" in response.text.lower()
+    )
+
+
+async def fetch_llm_batch(client: httpx.AsyncClient, count: int, language: str):
+    """
+    Request one batch of questions from the LLM API.
+    Retries timeouts, 429s and 5xx with exponential backoff + jitter.
+    Returns the raw response text, or None if the batch failed.
+    """
+    for attempt in range(LLM_MAX_RETRIES):
+        try:
+            async with _llm_semaphore():
+                response = await client.request(
+                    "GET",
+                    LLM_API_URL,
+                    json={
+                        "questionscount": count,
+                        "language": language
+                    }
+                )
+        except httpx.TransportError as e:
+            print(f"⚠️ LLM request failed (attempt {attempt + 1}): {e}")
+        else:
+            if response.status_code == 200:
+                return response.text
+
+            if not _is_retryable(response):
+                return None
+
+            print(f"⚠️ LLM returned {response.status_code} (attempt {attempt + 1})")
+
+        if attempt + 1 < LLM_MAX_RETRIES:
+            await asyncio.sleep(min(30, 2 ** attempt) + random.random())
+
+    return None
+
+
+async def generate_questions(total: int, language: str):
+    """
+    Generate `total` questions. Each round requests every missing batch
+    concurrently (bounded by the LLM semaphore), then tops up if short.
+    """
+    all_questions = []
+    attempts = 0
+
+    async with httpx.AsyncClient(timeout=LLM_TIMEOUT_SECS) as client:
+        while len(all_questions) < total and attempts < MAX_ATTEMPTS:
+            remaining = total - len(all_questions)
+
+            batch_counts = [
+                min(BATCH_SIZE, remaining - done)
+                for done in range(0, remaining, BATCH_SIZE)
+            ][:MAX_ATTEMPTS - attempts]
+
+            attempts += len(batch_counts)
+
+            raw_texts = await asyncio.gather(
+                *(fetch_llm_batch(client, count, language) for count in batch_counts),
+                return_exceptions=True
+            )
+
+            for raw_text in raw_texts:
+                if not raw_text or isinstance(raw_text, BaseException):
+                    continue
+
+                all_questions.extend(parse_llm_response(raw_text))
+
+    return all_questions
@@ -1,22 +1,27 @@
-from fastapi import FastAPI, Depends, HTTPException, Body
+from fastapi import FastAPI, Depends, HTTPException, Body, Path
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.orm import Session
-from sqlalchemy.orm.attributes import flag_modified
+from sqlalchemy.orm import Session, joinedload, raiseload
 from sqlalchemy import and_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from contextlib import asynccontextmanager
 
-import requests
+import anyio
 import traceback
 import json
+import math
 import re
 import os
-import boto3
 from datetime import datetime
+from typing import Annotated
 from dotenv import load_dotenv
 
-from .db import Base, engine, SessionLocal
-from . import models, schemas, exam
+from .db import Base, engine, SessionLocal, DB_POOL_SIZE, DB_MAX_OVERFLOW
+from . import models, schemas, exam, tasks
 from .cognito_auth import get_current_user
-from .email_utils import send_exam_assignment_email
+from .exam import load_questions, attempt_questions, flush_answers
+from .cache import get_db_user, invalidate_user, buffer_answers, restore_buffered_answers, mark_answer_buffer, clear_answer_buffer
+from .cognito_admin import cognito_client, COGNITO_USER_POOL_ID
 
 
 
@@ -28,84 +33,86 @@ def get_db():
         db.close()
 
 
-AWS_REGION = os.getenv("AWS_REGION")
-COGNITO_USER_POOL_ID = os.getenv("COGNITO_USER_POOL_ID")
-default_password = os.getenv("DEFAULT_PASSWORD")
+def require_user(
+    current_user=Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    # 🔍 Fetch DB user (cached) using Cognito email
+    db_user = get_db_user(db, current_user.get("email"))
 
-cognito_admin = boto3.client(
-    "cognito-idp",
-    region_name=AWS_REGION
-)
-# APP SETUP
+    if not db_user:
+        raise HTTPException(status_code=404, detail="User not found")
 
+    return db_user
 
-app = FastAPI(title="NMK Certification Portal")
 
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+def require_admin(
+    current_user=Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    # 🔐 Admin check straight from the JWT claims (no DB access)
+    if current_user.get("is_admin"):
+        return current_user
 
-Base.metadata.create_all(bind=engine)
+    # 👑 Admins that only exist in the DB (e.g. seeded by create_db.py)
+    # fall back to users.is_admin via the cached lookup
+    db_user = get_db_user(db, current_user.get("email"))
 
-LLM_API_URL = os.getenv("LLM_API_URL")
+    if not db_user or not db_user.is_admin:
+        raise HTTPException(status_code=403, detail="Admin only")
 
-# LLM RESPONSE PARSER
+    return current_user
 
 
-def parse_llm_response(raw_text: str):
-    import json, re
+def require_admin_user(
+    current_user=Depends(require_admin),
+    db: Session = Depends(get_db)
+):
+    # 🔍 Only for admin routes that record the admin's users.id
+    db_user = get_db_user(db, current_user.get("email"))
 
-    if not raw_text:
-        return []
+    if not db_user:
+        raise HTTPException(status_code=404, detail="User not found")
 
-    # Remove markdown fences
-    text = re.sub(r"```json|```", "", raw_text, flags=re.IGNORECASE).strip()
+    return db_user
 
-    # Find array start
-    start = text.find("[")
-    if start == -1:
-        return []
 
-    text = text[start:]  # do NOT force closing ]
+async def get_cognito():
+    return cognito_client()
 
-    questions = []
+# APP SETUP
 
-    # 🔥 Extract COMPLETE JSON OBJECTS ONLY
-    blocks = re.findall(r"\{[^{}]*\}", text, re.DOTALL)
+# Routes that touch the DB stay sync and run on anyio's worker threads;
+# size that pool to the DB pool so requests block on a connection, not on
+# a free thread. Handlers with no blocking I/O of their own are async def
+# and skip the thread hop.
+THREADPOOL_SIZE = int(os.getenv("THREADPOOL_SIZE", str(DB_POOL_SIZE + DB_MAX_OVERFLOW)))
 
-    for block in blocks:
-        try:
-            item = json.loads(block)
-        except Exception:
-            continue
 
-        q = item.get("Question")
-        opts = item.get("Options")
-        ans = item.get("Answer")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    anyio.to_thread.current_default_thread_limiter().total_tokens = THREADPOOL_SIZE
+    yield
 
-        if not q or not opts or not ans:
-            continue
 
-        answer_index = None
-        for i, opt in enumerate(opts):
-            if str(opt).strip() == str(ans).strip():
-                answer_index = i
-                break
+app = FastAPI(title="NMK Certification Portal", lifespan=lifespan)
 
-        if answer_index is None:
-            continue
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"],
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
 
-        questions.append({
-            "question": q,
-            "options": opts,
-            "answer_index": answer_index
-        })
+# Schema is managed by Alembic (see migrations/); local dev can opt in
+if os.getenv("AUTO_CREATE_SCHEMA") == "1":
+    Base.metadata.create_all(bind=engine)
 
-    return questions
+# Exam / question / attempt ids are native UUID columns; reject anything
+# else at the route instead of letting Postgres fail the cast.
+UUID_PATTERN = r"^[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}$"
+UUIDPath = Annotated[str, Path(pattern=UUID_PATTERN)]
 
 # =========================
 # COGNITO USER SYNC
@@ -119,46 +126,39 @@ def sync_user(
     email = payload.get("email")
     sub = payload.get("sub")
 
-    user = db.query(models.User).filter(
-        models.User.email == email
-    ).first()
-
-    if not user:
-        # 👑 Make NMK domain users admin
-        is_admin_user = email.endswith("@nmkglobalinc.com")
-
-        user = models.User(
+    # ⚡ Insert-if-missing in one statement (safe against concurrent first
+    # logins); a clash on either email or sub means the user already exists
+    # 👑 Role is decided from the token (Cognito group / NMK domain)
+    created = db.execute(
+        pg_insert(models.User)
+        .values(
             id=sub,
             email=email,
             name=email.split("@")[0],
-            is_admin=is_admin_user
+            is_admin=payload.get("is_admin", False)
         )
+        .on_conflict_do_nothing()
+        .returning(models.User.id)
+    ).first()
 
-        db.add(user)
-        db.commit()
-        db.refresh(user)
+    db.commit()
+
+    if created:
+        invalidate_user(email)
 
     return {"message": "User synced"}
 
 
 
 @app.get("/auth/me")
-def get_me(
-    current_user=Depends(get_current_user),
-    db: Session = Depends(get_db)
+async def get_me(
+    user=Depends(require_user),
+    current_user=Depends(get_current_user)
 ):
-    email = current_user.get("email")
-
-    user = db.query(models.User).filter(
-        models.User.email == email
-    ).first()
-
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-
     return {
         "email": user.email,
-        "is_admin": user.is_admin,
+        # Same rule as require_admin, so the UI and the API agree
+        "is_admin": bool(current_user["is_admin"] or user.is_admin),
         "name": user.name
     }
 
@@ -166,109 +166,76 @@ def get_me(
 
 
 # ADMIN
-@app.post("/admin/exams", response_model=schemas.ExamOut)
+@app.post("/admin/exams", status_code=202, response_model=schemas.ExamCreateAcceptedOut)
 def create_exam(
     exam_data: schemas.ExamCreateIn,
-    current_user=Depends(get_current_user),
+    db_user=Depends(require_admin_user),
     db: Session = Depends(get_db)
 ):
+    # 🧾 Create Exam (inactive until the worker has generated questions)
+    new_exam = models.Exam(
+        title=exam_data.title,
+        language=exam_data.language,
+        question_count=exam_data.question_count,
+        time_allowed_secs=exam_data.time_allowed_secs,
+        created_by=db_user.id,   # ✅ FIXED
+        is_active=False,
+        status="pending"
+    )
 
-    # 🔍 Fetch user from DB using Cognito email
-    db_user = db.query(models.User).filter(
-        models.User.email == current_user.get("email")
-    ).first()
-
-    # 🔐 Admin check
-    if not db_user or not db_user.is_admin:
-        raise HTTPException(status_code=403, detail="Admin only")
-
-    TOTAL_QUESTIONS = exam_data.question_count
-    BATCH_SIZE = 10
-    MAX_ATTEMPTS = 30
-
-    all_questions = []
-    attempts = 0
+    db.add(new_exam)
+    db.commit()
 
+    # 🤖 Generate questions in the background (Celery)
     try:
-        while len(all_questions) < TOTAL_QUESTIONS and attempts < MAX_ATTEMPTS:
-            attempts += 1
-
-            batch_count = min(BATCH_SIZE, TOTAL_QUESTIONS - len(all_questions))
-
-            response = requests.get(
-                LLM_API_URL,
-                json={
-                    "questionscount": batch_count,
-                    "language": exam_data.language
-                },
-                timeout=90
-            )
-
-            if response.status_code != 200:
-                continue
-
-            batch_questions = parse_llm_response(response.text)
-
-            if not batch_questions:
-                continue
-
-            all_questions.extend(batch_questions)
-
-        if len(all_questions) < TOTAL_QUESTIONS:
-            raise HTTPException(
-                status_code=500,
-                detail=f"Could only generate {len(all_questions)} questions after retries"
-            )
-
-        llm_questions = all_questions[:TOTAL_QUESTIONS]
-
-        # 🧾 Create Exam
-        new_exam = models.Exam(
-            title=exam_data.title,
-            language=exam_data.language,
-            question_count=len(llm_questions),
-            time_allowed_secs=exam_data.time_allowed_secs,
-            created_by=db_user.id,   # ✅ FIXED
-            is_active=True
+        task = tasks.generate_exam.delay(
+            new_exam.id,
+            exam_data.language,
+            exam_data.question_count
         )
+    except Exception as e:
+        print(traceback.format_exc())
+        new_exam.status = "failed"
+        db.commit()
+        raise HTTPException(status_code=503, detail=f"Could not queue question generation: {e}")
 
-        db.add(new_exam)
-        db.flush()
+    db.refresh(new_exam)
 
-        for q in llm_questions:
-            db.add(models.Question(
-                text=q["question"],
-                choices=q["options"],
-                answer_index=q["answer_index"],
-                exam_id=new_exam.id
-            ))
+    return {
+        "exam_id": new_exam.id,
+        "task_id": task.id,
+        "status": new_exam.status
+    }
 
-        db.commit()
-        db.refresh(new_exam)
-        return new_exam
 
-    except Exception as e:
-        db.rollback()
-        print(traceback.format_exc())
-        raise HTTPException(status_code=500, detail=str(e))
+@app.get("/admin/exams/{exam_id}/status")
+def get_exam_status(
+    exam_id: UUIDPath,
+    admin=Depends(require_admin),
+    db: Session = Depends(get_db)
+):
+    exam_obj = db.query(models.Exam).filter(
+        models.Exam.id == exam_id
+    ).first()
 
+    if not exam_obj:
+        raise HTTPException(status_code=404, detail="Exam not found")
+
+    return {
+        "exam_id": exam_obj.id,
+        "status": exam_obj.status,
+        "question_count": exam_obj.question_count,
+        "is_active": exam_obj.is_active
+    }
 
 
 @app.post("/admin/exams/{exam_id}/assign")
 def assign_exam(
-    exam_id: str,
+    exam_id: UUIDPath,
     payload: schemas.ExamAssignIn,
-    current_user=Depends(get_current_user),
+    db_user=Depends(require_admin_user),
     db: Session = Depends(get_db)
 ):
-    # 🔐 Admin check
-    db_user = db.query(models.User).filter(
-        models.User.email == current_user.get("email")
-    ).first()
-
-    if not db_user or not db_user.is_admin:
-        raise HTTPException(status_code=403, detail="Admin only")
-
     # 🔍 Validate exam
     exam_obj = db.query(models.Exam).filter(
         models.Exam.id == exam_id
@@ -277,109 +244,91 @@ def assign_exam(
     if not exam_obj:
         raise HTTPException(status_code=404, detail="Exam not found")
 
-    assigned_count = 0
-    emailed_count = 0
-    created_users = 0
-
-    for email in payload.candidate_emails:
-        email = email.strip().lower()
-        send_password = False
-
-        # 🔍 Check DB user
-        candidate = db.query(models.User).filter(
-            models.User.email == email
-        ).first()
-
-        # =========================
-        # CREATE USER IF NOT EXISTS IN DB
-        # =========================
-        if not candidate:
-            try:
-                # 🔥 Try creating in Cognito
-                cognito_admin.admin_create_user(
-                    UserPoolId=COGNITO_USER_POOL_ID,
-                    Username=email,
-                    UserAttributes=[
-                        {"Name": "email", "Value": email},
-                        {"Name": "email_verified", "Value": "true"}
-                    ],
-                    MessageAction="SUPPRESS"
-                )
-
-                cognito_admin.admin_set_user_password(
-                    UserPoolId=COGNITO_USER_POOL_ID,
-                    Username=email,
-                    Password=default_password,
-                    Permanent=True
-                )
-
-                print(f"✅ Cognito user created: {email}")
-                send_password = True
-
-            except cognito_admin.exceptions.UsernameExistsException:
-                print(f"⚠️ Cognito user already exists: {email}")
-                send_password = False
-
-            except Exception as e:
-                print(f"❌ Cognito creation failed: {e}")
-                raise HTTPException(status_code=500, detail="Cognito user creation failed")
-
-            # 🔥 Create DB user
-            candidate = models.User(
-                id=email,
-                email=email,
-                name=email.split("@")[0],
-                is_admin=False
-            )
-
-            db.add(candidate)
-            db.flush()
-            created_users += 1
-
-        # =========================
-        # PREVENT DUPLICATE ASSIGNMENT
-        # =========================
-        existing_assignment = db.query(models.ExamAssignment).filter(
-            models.ExamAssignment.exam_id == exam_id,
-            models.ExamAssignment.candidate_email == email
-        ).first()
-
-        if existing_assignment:
-            print(f"⚠️ Already assigned: {email}")
-            continue
-
-        # =========================
-        # CREATE ASSIGNMENT
-        # =========================
-        assignment = models.ExamAssignment(
-            exam_id=exam_id,
-            candidate_email=email,
-            assigned_by=db_user.id, 
-            status="assigned"
+    # Normalise + de-duplicate, keeping the admin's order
+    emails = list(dict.fromkeys(
+        email.strip().lower() for email in payload.candidate_emails
+    ))
+
+    # 🔍 One query for known users (email -> has a Cognito account)
+    existing_users = {
+        row.email: row.cognito_provisioned for row in db.query(
+            models.User.email, models.User.cognito_provisioned
+        ).filter(
+            models.User.email.in_(emails)
         )
+    }
+
+    # =========================
+    # CREATE USERS THAT DON'T EXIST IN DB
+    # (Cognito accounts are provisioned by the worker)
+    # =========================
+    new_users = [
+        {
+            "id": email,
+            "email": email,
+            "name": email.split("@")[0],
+            "is_admin": False,
+            "cognito_provisioned": False
+        }
+        for email in emails
+        if email not in existing_users
+    ]
+
+    exam.bulk_create_users(db, new_users)
 
-        db.add(assignment)
-        assigned_count += 1
-
-        # =========================
-        # SEND EMAIL
-        # =========================
-        try:
-            send_exam_assignment_email(
-                to_email=email,
-                exam_title=exam_obj.title,
-                send_password=send_password
-            )
-            emailed_count += 1
-        except Exception as e:
-            print(f"❌ Email failed for {email}: {e}")
+    # =========================
+    # CREATE ASSIGNMENTS (duplicates skipped by ON CONFLICT DO NOTHING)
+    # =========================
+    assigned_emails = exam.bulk_create_assignments(db, [
+        {
+            "exam_id": exam_id,
+            "candidate_email": email,
+            "assigned_by": db_user.id,
+            "status": "assigned"
+        }
+        for email in emails
+    ])
 
     db.commit()
 
+    already_assigned = set(emails) - set(assigned_emails)
+    for email in already_assigned:
+        print(f"⚠️ Already assigned: {email}")
+
+    for user in new_users:
+        invalidate_user(user["email"])
+
+    created_users = len(new_users)
+    assigned_count = len(assigned_emails)
+
+    # =========================
+    # QUEUE COGNITO + EMAILS
+    # Users without a Cognito account (new ones, plus any whose earlier
+    # provisioning never finished) get their email from the provisioning
+    # task, once the worker knows whether a password was set. That includes
+    # re-assignments: a reconciled account was never sent its password.
+    # Everyone else is emailed straight away (one SMTP session per batch).
+    # =========================
+    unprovisioned = [e for e in emails if not existing_users.get(e, False)]
+
+    try:
+        if unprovisioned:
+            tasks.provision_cognito_users.delay(unprovisioned, exam_obj.title)
+
+        queued_count = len(unprovisioned) + tasks.queue_exam_emails(
+            [(e, False) for e in assigned_emails if existing_users.get(e, False)],
+            exam_obj.title
+        )
+
+    except Exception as e:
+        # Users and assignments are already committed; don't fail the request
+        print(f"❌ Could not queue Cognito/email tasks: {e}")
+        queued_count = 0
+
     return {
         "message": "Exam assigned successfully",
         "assigned_count": assigned_count,
-        "emailed_count": emailed_count,
+        "queued_count": queued_count,
         "created_users": created_users
     }
 
@@ -387,30 +336,21 @@ def assign_exam(
 
 @app.get("/admin/candidates/results")
 def get_all_candidate_results(
-    current_user=Depends(get_current_user),
+    admin=Depends(require_admin),
     db: Session = Depends(get_db)
 ):
-    # 🔍 Fetch DB user using Cognito email
-    db_user = db.query(models.User).filter(
-        models.User.email == current_user.get("email")
-    ).first()
-
-    # 🔐 Admin check
-    if not db_user or not db_user.is_admin:
-        raise HTTPException(status_code=403, detail="Admin only")
-
-    # Get all candidate exams
+    # Get all candidate exams (user + exam joined in the same query;
+    # any other relationship access raises instead of lazy loading)
     results = []
-    candidate_exams = db.query(models.CandidateExam).all()
+    candidate_exams = db.query(models.CandidateExam).options(
+        joinedload(models.CandidateExam.user),
+        joinedload(models.CandidateExam.exam),
+        raiseload("*")
+    ).all()
 
     for ce in candidate_exams:
-        user = db.query(models.User).filter(
-            models.User.id == ce.user_id
-        ).first()
-
-        exam_obj = db.query(models.Exam).filter(
-            models.Exam.id == ce.exam_id
-        ).first()
+        user = ce.user
+        exam_obj = ce.exam
 
         if user and exam_obj:
             results.append({
@@ -430,21 +370,14 @@ def get_all_candidate_results(
 
 @app.get("/admin/exams/{exam_id}/assignments")
 def get_exam_assignments(
-    exam_id: str,
-    current_user=Depends(get_current_user),
+    exam_id: UUIDPath,
+    admin=Depends(require_admin),
     db: Session = Depends(get_db)
 ):
-    # 🔍 Fetch DB user using email from JWT
-    db_user = db.query(models.User).filter(
-        models.User.email == current_user.get("email")
-    ).first()
-
-    # 🔐 Admin check
-    if not db_user or not db_user.is_admin:
-        raise HTTPException(status_code=403, detail="Admin only")
-
     # 🔎 Get assignments
-    assignments = db.query(models.ExamAssignment).filter(
+    assignments = db.query(models.ExamAssignment).options(
+        raiseload("*")
+    ).filter(
         models.ExamAssignment.exam_id == exam_id
     ).all()
 
@@ -463,38 +396,22 @@ def get_exam_assignments(
 
 @app.get("/admin/exams")
 def list_all_exams(
-    current_user=Depends(get_current_user),
+    admin=Depends(require_admin),
     db: Session = Depends(get_db)
 ):
-    # 🔍 Fetch DB user
-    db_user = db.query(models.User).filter(
-        models.User.email == current_user.get("email")
-    ).first()
-
-    # 🔐 Admin check
-    if not db_user or not db_user.is_admin:
-        raise HTTPException(status_code=403, detail="Admin only")
-
-    return db.query(models.Exam).order_by(
+    return db.query(models.Exam).options(
+        raiseload("*")
+    ).order_by(
         models.Exam.created_at.desc()
     ).all()
 
 
 @app.patch("/admin/exams/{exam_id}/toggle")
 def toggle_exam_status(
-    exam_id: str,
-    current_user=Depends(get_current_user),
+    exam_id: UUIDPath,
+    admin=Depends(require_admin),
     db: Session = Depends(get_db)
 ):
-    # 🔍 Fetch DB user
-    db_user = db.query(models.User).filter(
-        models.User.email == current_user.get("email")
-    ).first()
-
-    # 🔐 Admin check
-    if not db_user or not db_user.is_admin:
-        raise HTTPException(status_code=403, detail="Admin only")
-
     exam_obj = db.query(models.Exam).filter(
         models.Exam.id == exam_id
     ).first()
@@ -522,21 +439,16 @@ def list_all_exams(
     # Get candidate email from JWT
     email = current_user.get("email")
 
-    # Get exams assigned to this candidate
-    assignments = db.query(models.ExamAssignment).filter(
+    # Return only active exams that are assigned to this user (one JOIN;
+    # (exam_id, candidate_email) is unique so no duplicate rows)
+    exams = db.query(models.Exam).join(
+        models.ExamAssignment,
+        models.ExamAssignment.exam_id == models.Exam.id
+    ).filter(
+        models.Exam.is_active == True,
         models.ExamAssignment.candidate_email == email
     ).all()
 
-    assigned_exam_ids = [a.exam_id for a in assignments]
-
-    # Return only active exams that are assigned to this user
-    exams = db.query(models.Exam).filter(
-        and_(
-            models.Exam.is_active == True,
-            models.Exam.id.in_(assigned_exam_ids)
-        )
-    ).all()
-
     return exams
 
 
@@ -545,18 +457,10 @@ def list_all_exams(
 
 @app.post("/exam/{exam_id}/start", response_model=schemas.CandidateExamCreateOut)
 def start_exam(
-    exam_id: str,
-    current_user=Depends(get_current_user),
+    exam_id: UUIDPath,
+    db_user=Depends(require_user),
     db: Session = Depends(get_db)
 ):
-    # 🔍 Fetch DB user using Cognito email
-    db_user = db.query(models.User).filter(
-        models.User.email == current_user.get("email")
-    ).first()
-
-    if not db_user:
-        raise HTTPException(status_code=404, detail="User not found")
-
     # ✅ Check if exam is assigned to this candidate
     assignment = db.query(models.ExamAssignment).filter(
         and_(
@@ -577,30 +481,30 @@ def start_exam(
     if existing:
         return existing
 
-    # ✅ Validate exam
-    exam_obj = db.query(models.Exam).filter(
-        models.Exam.id == exam_id,
-        models.Exam.is_active == True
-    ).first()
+    # ✅ Validate exam (is_active can change, so always from Postgres)
+    is_active = db.query(models.Exam.is_active).filter(
+        models.Exam.id == exam_id
+    ).scalar()
 
-    if not exam_obj:
+    if not is_active:
         raise HTTPException(status_code=404, detail="Exam not found")
 
-    # ✅ Get questions
-    questions = db.query(models.Question).filter(
-        models.Question.exam_id == exam_id
-    ).all()
+    # ✅ Get questions (cached in Redis)
+    content = exam.get_exam_content(db, exam_id)
+
+    if not content:
+        raise HTTPException(status_code=404, detail="Exam not found")
 
-    if not questions:
+    if not content["questions"]:
         raise HTTPException(status_code=400, detail="No questions found")
 
     # ✅ Create candidate exam
     candidate_exam = models.CandidateExam(
         user_id=db_user.id,
         exam_id=exam_id,
-        question_ids=[q.id for q in questions],
+        question_ids=[q["id"] for q in content["questions"]],
         answers={},
-        time_allowed_secs=exam_obj.time_allowed_secs,
+        time_allowed_secs=content["time_allowed_secs"],
         time_elapsed=0,
         status="in_progress"
     )
@@ -616,19 +520,48 @@ def start_exam(
     return candidate_exam
 
 
-@app.get("/exam/{candidate_exam_id}")
-def get_exam(
-    candidate_exam_id: str,
-    current_user=Depends(get_current_user),
+@app.get("/exam/resume")
+def resume_exam(
+    db_user=Depends(require_user),
     db: Session = Depends(get_db)
 ):
-    # 🔍 Fetch DB user using Cognito email
-    db_user = db.query(models.User).filter(
-        models.User.email == current_user.get("email")
+    # 🔎 Find active exam
+    exam = db.query(models.CandidateExam).filter(
+        models.CandidateExam.user_id == db_user.id,
+        models.CandidateExam.status == "in_progress"
     ).first()
 
-    if not db_user:
-        raise HTTPException(status_code=404, detail="User not found")
+    if not exam:
+        raise HTTPException(status_code=404, detail="No active exam")
+
+    # 💾 Pick up answers / time still staged in Redis
+    if flush_answers(db, exam.id, db_user.id):
+        db.refresh(exam)
+
+    mark_answer_buffer(exam.id, db_user.id)
+
+    # ✅ Build question list (cached exam content when available)
+    questions = attempt_questions(db, exam)
+
+    return {
+        "candidate_exam_id": exam.id,
+        "exam_id": exam.exam_id,
+        "questions": questions,
+        "answers": exam.answers or {},
+        "time_allowed_secs": exam.time_allowed_secs,
+        "time_elapsed": exam.time_elapsed,
+        "status": exam.status
+    }
+
+
+@app.get("/exam/{candidate_exam_id}")
+def get_exam(
+    candidate_exam_id: UUIDPath,
+    db_user=Depends(require_user),
+    db: Session = Depends(get_db)
+):
+    # 💾 Pick up answers / time still staged in Redis
+    flush_answers(db, candidate_exam_id, db_user.id)
 
     # 🔎 Fetch candidate exam
     candidate_exam = db.query(models.CandidateExam).filter(
@@ -639,19 +572,10 @@ def get_exam(
     if not candidate_exam:
         raise HTTPException(status_code=404, detail="Exam not found")
 
-    # ✅ Preserve question building logic
-    questions = []
-    for qid in candidate_exam.question_ids or []:
-        question = db.query(models.Question).filter(
-            models.Question.id == qid
-        ).first()
-
-        if question:
-            questions.append({
-                "id": question.id,
-                "text": question.text,
-                "choices": question.choices
-            })
+    mark_answer_buffer(candidate_exam.id, db_user.id)
+
+    # ✅ Build question list (cached exam content when available)
+    questions = attempt_questions(db, candidate_exam)
 
     return {
         "id": candidate_exam.id,
@@ -666,152 +590,97 @@ def get_exam(
 
 @app.post("/exam/{candidate_exam_id}/save-answer")
 def save_answer(
-    candidate_exam_id: str,
+    candidate_exam_id: UUIDPath,
     payload: schemas.AnswerIn,
-    current_user=Depends(get_current_user),
+    db_user=Depends(require_user),
     db: Session = Depends(get_db)
 ):
-    # 🔍 Fetch DB user using Cognito email
-    db_user = db.query(models.User).filter(
-        models.User.email == current_user.get("email")
-    ).first()
+    patch = {str(payload.question_id): payload.selected_index}
 
-    if not db_user:
-        raise HTTPException(status_code=404, detail="User not found")
+    # ⚡ Stage in Redis; the worker flushes to Postgres
+    if buffer_answers(candidate_exam_id, db_user.id, patch, payload.time_elapsed):
+        return {"msg": "answer_saved"}
 
-    # 🔎 Fetch candidate exam
-    candidate_exam = db.query(models.CandidateExam).filter(
-        models.CandidateExam.id == candidate_exam_id,
-        models.CandidateExam.user_id == db_user.id
-    ).first()
+    # ✅ Patch the one answer in place (single UPDATE, no read)
+    saved = exam.merge_answers(db, candidate_exam_id, db_user.id, patch, payload.time_elapsed)
 
-    if not candidate_exam:
+    if not saved:
         raise HTTPException(status_code=404, detail="Exam not found")
 
-    # ✅ Preserve existing logic
-    answers = dict(candidate_exam.answers or {})
-    answers[str(payload.question_id)] = payload.selected_index
+    db.commit()
+    mark_answer_buffer(candidate_exam_id, db_user.id)
+
+    return {"msg": "answer_saved"}
 
-    candidate_exam.answers = answers
-    candidate_exam.time_elapsed = payload.time_elapsed
+def _int_field(item, key: str, whole: bool = False) -> int:
+    # Bulk-save takes a raw dict, so coerce here the way Postgres used to
+    # (JS clients send e.g. 12.5 seconds); reject anything non-numeric
+    value = item.get(key) if isinstance(item, dict) else None
 
-    flag_modified(candidate_exam, "answers")
+    try:
+        if isinstance(value, bool):
+            raise ValueError
+        number = float(value)
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail=f"Invalid {key}")
 
-    db.commit()
-    db.refresh(candidate_exam)
+    if not math.isfinite(number) or (whole and not number.is_integer()):
+        raise HTTPException(status_code=400, detail=f"Invalid {key}")
+
+    return round(number)
 
-    return {"msg": "answer_saved"}
 
 @app.post("/exam/{candidate_exam_id}/bulk-save")
 def bulk_save_answers(
-    candidate_exam_id: str,
+    candidate_exam_id: UUIDPath,
     payload: dict,
-    current_user=Depends(get_current_user),
+    db_user=Depends(require_user),
     db: Session = Depends(get_db)
 ):
-    # 🔍 Fetch DB user
-    db_user = db.query(models.User).filter(
-        models.User.email == current_user.get("email")
-    ).first()
+    answers_payload = payload.get("answers", [])
 
-    if not db_user:
-        raise HTTPException(status_code=404, detail="User not found")
+    patch = {}
+    time_elapsed = None
 
-    # 🔎 Fetch candidate exam
-    candidate_exam = db.query(models.CandidateExam).filter(
-        models.CandidateExam.id == candidate_exam_id,
-        models.CandidateExam.user_id == db_user.id
-    ).first()
+    if not isinstance(answers_payload, list):
+        raise HTTPException(status_code=400, detail="Invalid answers")
 
-    if not candidate_exam:
-        raise HTTPException(status_code=404, detail="Exam not found")
-
-    answers_payload = payload.get("answers", [])
+    for item in answers_payload:
+        if not isinstance(item, dict) or item.get("question_id") is None:
+            raise HTTPException(status_code=400, detail="Invalid question_id")
 
-    # Get existing answers dict
-    answers = dict(candidate_exam.answers or {})
+        patch[str(item["question_id"])] = _int_field(item, "selected_index", whole=True)
+        time_elapsed = _int_field(item, "time_elapsed")
 
-    for item in answers_payload:
-        question_id = str(item["question_id"])
-        selected_index = item["selected_index"]
-        time_elapsed = item["time_elapsed"]
+    # ⚡ Stage in Redis; the worker flushes to Postgres
+    if buffer_answers(candidate_exam_id, db_user.id, patch, time_elapsed):
+        return {"msg": "bulk_saved"}
 
-        answers[question_id] = selected_index
-        candidate_exam.time_elapsed = time_elapsed
+    # ✅ Merge every answer with one UPDATE
+    saved = exam.merge_answers(db, candidate_exam_id, db_user.id, patch, time_elapsed)
 
-    candidate_exam.answers = answers
-    flag_modified(candidate_exam, "answers")
+    if not saved:
+        raise HTTPException(status_code=404, detail="Exam not found")
 
     db.commit()
-    db.refresh(candidate_exam)
+    mark_answer_buffer(candidate_exam_id, db_user.id)
 
     return {"msg": "bulk_saved"}
 
 
-@app.get("/exam/resume")
-def resume_exam(
-    current_user=Depends(get_current_user),
-    db: Session = Depends(get_db)
-):
-    # 🔍 Fetch DB user using Cognito email
-    db_user = db.query(models.User).filter(
-        models.User.email == current_user.get("email")
-    ).first()
-
-    if not db_user:
-        raise HTTPException(status_code=404, detail="User not found")
-
-    # 🔎 Find active exam
-    exam = db.query(models.CandidateExam).filter(
-        models.CandidateExam.user_id == db_user.id,
-        models.CandidateExam.status == "in_progress"
-    ).first()
-
-    if not exam:
-        raise HTTPException(status_code=404, detail="No active exam")
-
-    # ✅ Build question list (existing feature preserved)
-    questions = []
-    for qid in exam.question_ids or []:
-        q = db.query(models.Question).filter(
-            models.Question.id == qid
-        ).first()
-
-        if q:
-            questions.append({
-                "id": q.id,
-                "text": q.text,
-                "choices": q.choices
-            })
-
-    return {
-        "candidate_exam_id": exam.id,
-        "exam_id": exam.exam_id,
-        "questions": questions,
-        "answers": exam.answers or {},
-        "time_allowed_secs": exam.time_allowed_secs,
-        "time_elapsed": exam.time_elapsed,
-        "status": exam.status
-    }
-
-
 
 
 
 @app.post("/exam/{candidate_exam_id}/submit")
 def submit_exam(
-    candidate_exam_id: str,
+    candidate_exam_id: UUIDPath,
     final_time_elapsed: int = Body(..., embed=True),
-    current_user=Depends(get_current_user),
+    db_user=Depends(require_user),
     db: Session = Depends(get_db)
 ):
-    # 🔍 Fetch DB user using Cognito email
-    db_user = db.query(models.User).filter(
-        models.User.email == current_user.get("email")
-    ).first()
-
-    if not db_user:
-        raise HTTPException(status_code=404, detail="User not found")
+    # 🔒 Lock the attempt and pull in answers still staged in Redis; the
+    # lock keeps the beat flush out until this transaction commits
+    staged = flush_answers(db, candidate_exam_id, db_user.id, commit=False)
 
     # 🔎 Fetch candidate exam for this user
     candidate_exam = db.query(models.CandidateExam).filter(
@@ -827,11 +696,19 @@ def submit_exam(
     candidate_exam.status = "completed"
     candidate_exam.ended_at = datetime.utcnow()
 
-    # ✅ Compute score (existing feature preserved)
-    exam.compute_score(db, candidate_exam)
+    try:
+        # ✅ Compute score (existing feature preserved)
+        exam.compute_score(db, candidate_exam)
+
+        db.commit()
+    except Exception:
+        db.rollback()
+        if staged:
+            restore_buffered_answers(candidate_exam_id, db_user.id, *staged)
+        raise
 
-    db.commit()
     db.refresh(candidate_exam)
+    clear_answer_buffer(candidate_exam_id, db_user.id)
 
     return {
         "msg": "exam_submitted",
@@ -844,18 +721,10 @@ def submit_exam(
 
 @app.get("/exam/{candidate_exam_id}/result")
 def get_result(
-    candidate_exam_id: str,
-    current_user=Depends(get_current_user),
+    candidate_exam_id: UUIDPath,
+    db_user=Depends(require_user),
     db: Session = Depends(get_db)
 ):
-    # 🔍 Fetch DB user using Cognito email
-    db_user = db.query(models.User).filter(
-        models.User.email == current_user.get("email")
-    ).first()
-
-    if not db_user:
-        raise HTTPException(status_code=404, detail="User not found")
-
     # 🔎 Fetch candidate exam
     candidate_exam = db.query(models.CandidateExam).filter(
         models.CandidateExam.id == candidate_exam_id,
@@ -868,20 +737,15 @@ def get_result(
     details = []
     answers = candidate_exam.answers or {}
 
-    for qid in candidate_exam.question_ids or []:
-        question = db.query(models.Question).filter(
-            models.Question.id == qid
-        ).first()
-
-        if question:
-            selected = answers.get(str(qid))
-            details.append({
-                "question": question.text,
-                "choices": question.choices,
-                "selected": selected,
-                "correct_index": question.answer_index,
-                "is_correct": selected == question.answer_index
-            })
+    for question in load_questions(db, candidate_exam.question_ids):
+        selected = answers.get(str(question.id))
+        details.append({
+            "question": question.text,
+            "choices": question.choices,
+            "selected": selected,
+            "correct_index": question.answer_index,
+            "is_correct": selected == question.answer_index
+        })
 
     return {
         "score": candidate_exam.score,
@@ -891,17 +755,19 @@ def get_result(
 
 
 @app.post("/auth/change-password-admin")
-def change_password_admin(
+async def change_password_admin(
     payload: dict = Body(...),
     current_user=Depends(get_current_user),
+    cognito=Depends(get_cognito)
 ):
     email = current_user.get("email")
     old_password = payload.get("current_password")
     new_password = payload.get("new_password")
 
     try:
-        # 🔐 Verify old password by trying login
-        cognito_admin.admin_initiate_auth(
+        # 🔐 Verify old password by trying login (boto3 blocks, keep it off the loop)
+        await run_in_threadpool(
+            cognito.admin_initiate_auth,
             UserPoolId=COGNITO_USER_POOL_ID,
             ClientId=os.getenv("COGNITO_CLIENT_ID"),
             AuthFlow="ADMIN_USER_PASSWORD_AUTH",
@@ -912,7 +778,8 @@ def change_password_admin(
         )
 
         # ✅ If login works → password is correct
-        cognito_admin.admin_set_user_password(
+        await run_in_threadpool(
+            cognito.admin_set_user_password,
             UserPoolId=COGNITO_USER_POOL_ID,
             Username=email,
             Password=new_password,
@@ -921,7 +788,7 @@ def change_password_admin(
 
         return {"message": "Password updated successfully"}
 
-    except cognito_admin.exceptions.NotAuthorizedException:
+    except cognito.exceptions.NotAuthorizedException:
         raise HTTPException(status_code=400, detail="Current password is incorrect")
 
     except Exception as e:
@@ -8,9 +8,11 @@ from sqlalchemy import (
     DateTime,
     Boolean,
     Enum,
-    JSON,
-    ForeignKey
+    ForeignKey,
+    Index
 )
+from sqlalchemy.dialects.postgresql import UUID, JSONB
+from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from .db import Base
 
@@ -22,6 +24,10 @@ def gen_id():
     return str(uuid.uuid4())
 
 
+# Native 16-byte uuid column; values stay plain strings in Python / JSON
+UUIDStr = UUID(as_uuid=False)
+
+
 # -------------------------------------------------
 # Enums
 # -------------------------------------------------
@@ -50,6 +56,9 @@ class User(Base):
     # Application-level role
     is_admin = Column(Boolean, default=False)
 
+    # False while assign_exam's Cognito account is still being created
+    cognito_provisioned = Column(Boolean, nullable=False, default=True, server_default="true")
+
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
 
@@ -59,17 +68,17 @@ class User(Base):
 class Question(Base):
     __tablename__ = "questions"
 
-    id = Column(String, primary_key=True, default=gen_id)
+    id = Column(UUIDStr, primary_key=True, default=gen_id)
     text = Column(String, nullable=False)
 
     # List of choices
-    choices = Column(JSON, nullable=False)
+    choices = Column(JSONB, nullable=False)
 
     # Index of correct answer (0-based)
     answer_index = Column(Integer, nullable=False)
 
     # Optional link to exam
-    exam_id = Column(String, ForeignKey("exams.id"), nullable=True)
+    exam_id = Column(UUIDStr, ForeignKey("exams.id"), nullable=True, index=True)
 
     difficulty = Column(
         Enum(Difficulty),
@@ -84,7 +93,7 @@ class Question(Base):
 class Exam(Base):
     __tablename__ = "exams"
 
-    id = Column(String, primary_key=True, default=gen_id)
+    id = Column(UUIDStr, primary_key=True, default=gen_id)
     title = Column(String, nullable=False)
     language = Column(String, nullable=False)
 
@@ -92,21 +101,30 @@ class Exam(Base):
     time_allowed_secs = Column(Integer, nullable=False)
 
     # Cognito user id of admin who created exam
-    created_by = Column(String, ForeignKey("users.id"), nullable=False)
+    created_by = Column(String, ForeignKey("users.id"), nullable=False, index=True)
 
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     is_active = Column(Boolean, default=True)
 
+    # pending / ready / failed (questions are generated in the background)
+    status = Column(String, nullable=False, default="ready", server_default="ready")
+
 
 # -------------------------------------------------
 # Exam Assignments
 # -------------------------------------------------
 class ExamAssignment(Base):
     __tablename__ = "exam_assignments"
+    __table_args__ = (
+        # One assignment per candidate per exam; also serves exam_id lookups
+        Index("ix_assign_exam_email", "exam_id", "candidate_email", unique=True),
+        # Candidate-side lookups (by email, then exam)
+        Index("ix_ea_cand_exam", "candidate_email", "exam_id"),
+    )
 
-    id = Column(String, primary_key=True, default=gen_id)
+    id = Column(UUIDStr, primary_key=True, default=gen_id)
 
-    exam_id = Column(String, ForeignKey("exams.id"), nullable=False)
+    exam_id = Column(UUIDStr, ForeignKey("exams.id"), nullable=False)
 
     # Candidate email (may or may not exist in users table yet)
     candidate_email = Column(String, nullable=False)
@@ -125,19 +143,24 @@ class ExamAssignment(Base):
 # -------------------------------------------------
 class CandidateExam(Base):
     __tablename__ = "candidate_exams"
+    __table_args__ = (
+        Index("ix_ce_user_exam", "user_id", "exam_id"),
+        # Resume: the user's in-progress attempt
+        Index("ix_ce_user_status", "user_id", "status"),
+    )
 
-    id = Column(String, primary_key=True, default=gen_id)
+    id = Column(UUIDStr, primary_key=True, default=gen_id)
 
     # Cognito user id
     user_id = Column(String, ForeignKey("users.id"), nullable=False)
 
-    exam_id = Column(String, ForeignKey("exams.id"), nullable=False)
+    exam_id = Column(UUIDStr, ForeignKey("exams.id"), nullable=False, index=True)
 
     # Ordered list of question IDs
-    question_ids = Column(JSON, nullable=True)
+    question_ids = Column(JSONB, nullable=True)
 
     # question_id -> selected answer index
-    answers = Column(JSON, nullable=True)
+    answers = Column(JSONB, nullable=True)
 
     started_at = Column(DateTime(timezone=True), server_default=func.now())
     ended_at = Column(DateTime, nullable=True)
@@ -149,3 +172,6 @@ class CandidateExam(Base):
     time_elapsed = Column(Integer, default=0)
 
     score = Column(Integer, default=0)
+
+    user = relationship("User")
+    exam = relationship("Exam")
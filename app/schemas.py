@@ -43,6 +43,11 @@ class ExamOut(BaseModel):
     created_at: datetime
     is_active: bool
 
+class ExamCreateAcceptedOut(BaseModel):
+    exam_id: str
+    task_id: str
+    status: str
+
 class ExamAssignIn(BaseModel):
     candidate_emails: List[EmailStr]
 
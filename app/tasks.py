@@ -0,0 +1,231 @@
+# backend/app/tasks.py
+# Start a worker with:  celery -A app.tasks worker --loglevel=info
+import os
+import asyncio
+import traceback
+
+from botocore.exceptions import BotoCoreError, ClientError
+from celery import Celery
+from celery.exceptions import Retry
+from dotenv import load_dotenv
+
+from .db import SessionLocal
+from . import models, exam, llm
+from .email_utils import send_exam_assignment_emails, EMAIL_BATCH_SIZE
+from .cache import REDIS_URL, buffered_answer_exams
+from .cognito_admin import cognito_client, create_cognito_user
+
+load_dotenv()
+
+CELERY_BROKER = os.getenv("CELERY_BROKER")
+
+celery_app = Celery("cert", broker=CELERY_BROKER, backend=REDIS_URL)
+
+# No broker configured (local dev): run tasks inline in the caller
+celery_app.conf.task_always_eager = not CELERY_BROKER
+celery_app.conf.task_eager_propagates = True
+
+# How often buffered answer saves are written to Postgres
+ANSWER_FLUSH_SECS = float(os.getenv("ANSWER_FLUSH_SECS", "5"))
+
+
+# =========================
+# EXAM QUESTION GENERATION
+# =========================
+
+@celery_app.task(bind=True, max_retries=5)
+def generate_exam(self, exam_id: str, language: str, question_count: int):
+    """
+    Generate questions for a pending exam and mark it ready.
+    Short batches are retried with exponential backoff; after the last
+    retry the exam is marked failed.
+    """
+    db = SessionLocal()
+    try:
+        # No DB connection is checked out until the first query below
+        all_questions = asyncio.run(llm.generate_questions(question_count, language))
+
+        exam_obj = db.query(models.Exam).filter(
+            models.Exam.id == exam_id
+        ).first()
+
+        if not exam_obj or exam_obj.status != "pending":
+            return
+
+        if len(all_questions) < question_count:
+            # Eager (no broker) runs inside the request: fail fast instead
+            if not self.request.is_eager and self.request.retries < self.max_retries:
+                raise self.retry(countdown=10 * 2 ** self.request.retries)
+
+            print(f"❌ Could only generate {len(all_questions)} questions for exam {exam_id}")
+            exam_obj.status = "failed"
+            db.commit()
+            return
+
+        llm_questions = all_questions[:question_count]
+
+        exam.bulk_create_questions(db, [
+            {
+                "text": q["question"],
+                "choices": q["options"],
+                "answer_index": q["answer_index"],
+                "exam_id": exam_id
+            }
+            for q in llm_questions
+        ])
+
+        exam_obj.question_count = len(llm_questions)
+        exam_obj.status = "ready"
+        exam_obj.is_active = True
+
+        db.commit()
+
+    except Retry:
+        raise
+
+    except Exception:
+        db.rollback()
+        print(traceback.format_exc())
+        # Don't leave the exam pending forever; the status endpoint reports it
+        _mark_exam_failed(exam_id)
+        raise
+
+    finally:
+        db.close()
+
+
+def _mark_exam_failed(exam_id: str):
+    db = SessionLocal()
+    try:
+        db.query(models.Exam).filter(
+            models.Exam.id == exam_id,
+            models.Exam.status == "pending"
+        ).update({"status": "failed"}, synchronize_session=False)
+        db.commit()
+    except Exception:
+        db.rollback()
+        print(traceback.format_exc())
+    finally:
+        db.close()
+
+
+# =========================
+# ASSIGNMENT EMAILS
+# =========================
+
+@celery_app.task(bind=True, max_retries=5)
+def send_exam_emails_task(self, recipients, exam_title: str):
+    """
+    Send one batch of assignment emails over a single SMTP session.
+    recipients: list of [to_email, send_password] pairs.
+    Recipients that were not sent are retried with exponential backoff.
+    """
+    sent = set(send_exam_assignment_emails(recipients, exam_title))
+    unsent = [r for r in recipients if r[0] not in sent]
+
+    if unsent and not self.request.is_eager and self.request.retries < self.max_retries:
+        raise self.retry(args=(unsent, exam_title), countdown=2 ** (self.request.retries + 1))
+
+    return len(sent)
+
+
+def queue_exam_emails(recipients, exam_title: str):
+    """
+    Queue assignment emails in EMAIL_BATCH_SIZE chunks.
+    Returns the number of recipients queued.
+    """
+    for start in range(0, len(recipients), EMAIL_BATCH_SIZE):
+        send_exam_emails_task.delay(
+            recipients[start:start + EMAIL_BATCH_SIZE], exam_title
+        )
+
+    return len(recipients)
+
+
+# =========================
+# COGNITO PROVISIONING
+# =========================
+
+@celery_app.task(bind=True, max_retries=5)
+def provision_cognito_users(self, emails, exam_title: str = None):
+    """
+    Create Cognito accounts for candidates assign_exam added to the DB.
+    Accounts that are ready are marked provisioned and, if exam_title is
+    given, get their assignment email (with the temporary password only
+    when it was set here) before any retry. Emails that hit an AWS error
+    are retried with exponential backoff; ones that never succeed stay
+    unprovisioned and are picked up again by the next assign_exam.
+    """
+    cognito = cognito_client()
+    recipients = []
+    failed = []
+
+    try:
+        for email in emails:
+            try:
+                recipients.append((email, create_cognito_user(cognito, email)))
+            except (ClientError, BotoCoreError) as e:
+                print(f"❌ Cognito creation failed for {email}: {e}")
+                failed.append(email)
+
+    finally:
+        # Even if something unexpected aborts the loop, finish what succeeded
+        if recipients:
+            _mark_provisioned([email for email, _ in recipients])
+
+            if exam_title:
+                queue_exam_emails(recipients, exam_title)
+
+    if failed and not self.request.is_eager and self.request.retries < self.max_retries:
+        raise self.retry(args=(failed, exam_title), countdown=2 ** (self.request.retries + 1))
+
+    return len(recipients)
+
+
+def _mark_provisioned(emails):
+    db = SessionLocal()
+    try:
+        db.query(models.User).filter(
+            models.User.email.in_(emails)
+        ).update({"cognito_provisioned": True}, synchronize_session=False)
+        db.commit()
+    except Exception:
+        db.rollback()
+        print(traceback.format_exc())
+    finally:
+        db.close()
+
+
+# =========================
+# ANSWER BUFFER FLUSH
+# Run beat alongside the worker:  celery -A app.tasks beat
+# =========================
+
+@celery_app.task
+def flush_answer_buffers():
+    """Persist every candidate exam with answers staged in Redis."""
+    flushed = 0
+
+    db = SessionLocal()
+    try:
+        for candidate_exam_id, user_id in buffered_answer_exams():
+            try:
+                if exam.flush_answers(db, candidate_exam_id, user_id):
+                    flushed += 1
+            except Exception:
+                # Release the row lock / aborted transaction before the next pair
+                db.rollback()
+                print(traceback.format_exc())
+
+    finally:
+        db.close()
+
+    return flushed
+
+
+celery_app.conf.beat_schedule = {
+    "flush-answer-buffers": {
+        "task": flush_answer_buffers.name,
+        "schedule": ANSWER_FLUSH_SECS,
+    },
+}
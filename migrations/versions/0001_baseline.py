@@ -0,0 +1,84 @@
+"""baseline schema (as built by Base.metadata.create_all before migrations)
+
+Existing databases created with create_all are adopted with
+    alembic stamp 0001_baseline && alembic upgrade head
+
+Revision ID: 0001_baseline
+Revises:
+Create Date: 2026-10-15
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001_baseline"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "users",
+        sa.Column("id", sa.String(), primary_key=True),
+        sa.Column("email", sa.String(), nullable=False),
+        sa.Column("name", sa.String(), nullable=True),
+        sa.Column("is_admin", sa.Boolean(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    )
+    op.create_index("ix_users_email", "users", ["email"], unique=True)
+
+    op.create_table(
+        "exams",
+        sa.Column("id", sa.String(), primary_key=True),
+        sa.Column("title", sa.String(), nullable=False),
+        sa.Column("language", sa.String(), nullable=False),
+        sa.Column("question_count", sa.Integer(), nullable=False),
+        sa.Column("time_allowed_secs", sa.Integer(), nullable=False),
+        sa.Column("created_by", sa.String(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.Column("is_active", sa.Boolean(), nullable=True),
+    )
+
+    op.create_table(
+        "questions",
+        sa.Column("id", sa.String(), primary_key=True),
+        sa.Column("text", sa.String(), nullable=False),
+        sa.Column("choices", sa.JSON(), nullable=False),
+        sa.Column("answer_index", sa.Integer(), nullable=False),
+        sa.Column("exam_id", sa.String(), sa.ForeignKey("exams.id"), nullable=True),
+        sa.Column("difficulty", sa.Enum("easy", "medium", "hard", name="difficulty"), nullable=False),
+    )
+
+    op.create_table(
+        "exam_assignments",
+        sa.Column("id", sa.String(), primary_key=True),
+        sa.Column("exam_id", sa.String(), sa.ForeignKey("exams.id"), nullable=False),
+        sa.Column("candidate_email", sa.String(), nullable=False),
+        sa.Column("assigned_by", sa.String(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("assigned_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.Column("status", sa.String(), nullable=True),
+    )
+
+    op.create_table(
+        "candidate_exams",
+        sa.Column("id", sa.String(), primary_key=True),
+        sa.Column("user_id", sa.String(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("exam_id", sa.String(), sa.ForeignKey("exams.id"), nullable=False),
+        sa.Column("question_ids", sa.JSON(), nullable=True),
+        sa.Column("answers", sa.JSON(), nullable=True),
+        sa.Column("started_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.Column("ended_at", sa.DateTime(), nullable=True),
+        sa.Column("status", sa.String(), nullable=True),
+        sa.Column("time_allowed_secs", sa.Integer(), nullable=True),
+        sa.Column("time_elapsed", sa.Integer(), nullable=True),
+        sa.Column("score", sa.Integer(), nullable=True),
+    )
+
+
+def downgrade():
+    op.drop_table("candidate_exams")
+    op.drop_table("exam_assignments")
+    op.drop_table("questions")
+    op.drop_table("exams")
+    op.drop_table("users")
+    sa.Enum(name="difficulty").drop(op.get_bind(), checkfirst=True)
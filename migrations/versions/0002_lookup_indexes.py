@@ -0,0 +1,32 @@
+"""indexes for assignment and attempt lookups
+
+Revision ID: 0002_lookup_indexes
+Revises: 0001_baseline
+Create Date: 2026-10-15
+"""
+from alembic import op
+
+revision = "0002_lookup_indexes"
+down_revision = "0001_baseline"
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ("ix_exams_created_by", "exams", ["created_by"]),
+    ("ix_exam_assignments_exam_id", "exam_assignments", ["exam_id"]),
+    ("ix_exam_assignments_candidate_email", "exam_assignments", ["candidate_email"]),
+    ("ix_ea_cand_exam", "exam_assignments", ["candidate_email", "exam_id"]),
+    ("ix_candidate_exams_user_id", "candidate_exams", ["user_id"]),
+    ("ix_candidate_exams_exam_id", "candidate_exams", ["exam_id"]),
+    ("ix_ce_user_exam", "candidate_exams", ["user_id", "exam_id"]),
+]
+
+
+def upgrade():
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns)
+
+
+def downgrade():
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
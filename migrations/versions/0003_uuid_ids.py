@@ -0,0 +1,55 @@
+"""store exam / question / assignment / attempt ids as native uuid
+
+Revision ID: 0003_uuid_ids
+Revises: 0002_lookup_indexes
+Create Date: 2026-10-15
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "0003_uuid_ids"
+down_revision = "0002_lookup_indexes"
+branch_labels = None
+depends_on = None
+
+# Foreign keys onto exams.id (Postgres default names from create_all)
+EXAM_FKS = [
+    ("questions_exam_id_fkey", "questions"),
+    ("exam_assignments_exam_id_fkey", "exam_assignments"),
+    ("candidate_exams_exam_id_fkey", "candidate_exams"),
+]
+
+COLUMNS = [
+    ("exams", "id"),
+    ("questions", "id"),
+    ("questions", "exam_id"),
+    ("exam_assignments", "id"),
+    ("exam_assignments", "exam_id"),
+    ("candidate_exams", "id"),
+    ("candidate_exams", "exam_id"),
+]
+
+
+def _retype(type_, cast):
+    for name, table in EXAM_FKS:
+        op.drop_constraint(name, table, type_="foreignkey")
+
+    for table, column in COLUMNS:
+        op.alter_column(
+            table,
+            column,
+            type_=type_,
+            postgresql_using=f"{column}::{cast}"
+        )
+
+    for name, table in EXAM_FKS:
+        op.create_foreign_key(name, table, "exams", ["exam_id"], ["id"])
+
+
+def upgrade():
+    _retype(postgresql.UUID(as_uuid=False), "uuid")
+
+
+def downgrade():
+    _retype(sa.String(), "varchar")
@@ -0,0 +1,40 @@
+"""store JSON columns as jsonb
+
+Revision ID: 0004_jsonb_columns
+Revises: 0003_uuid_ids
+Create Date: 2026-10-15
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "0004_jsonb_columns"
+down_revision = "0003_uuid_ids"
+branch_labels = None
+depends_on = None
+
+COLUMNS = [
+    ("questions", "choices"),
+    ("candidate_exams", "question_ids"),
+    ("candidate_exams", "answers"),
+]
+
+
+def upgrade():
+    for table, column in COLUMNS:
+        op.alter_column(
+            table,
+            column,
+            type_=postgresql.JSONB(),
+            postgresql_using=f"{column}::jsonb"
+        )
+
+
+def downgrade():
+    for table, column in COLUMNS:
+        op.alter_column(
+            table,
+            column,
+            type_=sa.JSON(),
+            postgresql_using=f"{column}::json"
+        )
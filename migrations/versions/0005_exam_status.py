@@ -0,0 +1,24 @@
+"""add exams.status for background question generation
+
+Revision ID: 0005_exam_status
+Revises: 0004_jsonb_columns
+Create Date: 2026-10-15
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0005_exam_status"
+down_revision = "0004_jsonb_columns"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        "exams",
+        sa.Column("status", sa.String(), nullable=False, server_default="ready")
+    )
+
+
+def downgrade():
+    op.drop_column("exams", "status")
@@ -0,0 +1,45 @@
+"""indexes for assignment dedupe, resume and question lookups
+
+Revision ID: 0006_hot_path_indexes
+Revises: 0005_exam_status
+Create Date: 2026-10-15
+"""
+from alembic import op
+
+revision = "0006_hot_path_indexes"
+down_revision = "0005_exam_status"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Drop duplicate assignments left by earlier races before going unique
+    op.execute("""
+        DELETE FROM exam_assignments a
+        USING exam_assignments b
+        WHERE a.exam_id = b.exam_id
+          AND a.candidate_email = b.candidate_email
+          AND a.ctid > b.ctid
+    """)
+
+    op.create_index(
+        "ix_assign_exam_email", "exam_assignments",
+        ["exam_id", "candidate_email"], unique=True
+    )
+    op.create_index("ix_ce_user_status", "candidate_exams", ["user_id", "status"])
+    op.create_index("ix_questions_exam_id", "questions", ["exam_id"])
+
+    # Covered by the composites' leading columns
+    op.drop_index("ix_exam_assignments_exam_id", table_name="exam_assignments")
+    op.drop_index("ix_exam_assignments_candidate_email", table_name="exam_assignments")
+    op.drop_index("ix_candidate_exams_user_id", table_name="candidate_exams")
+
+
+def downgrade():
+    op.create_index("ix_candidate_exams_user_id", "candidate_exams", ["user_id"])
+    op.create_index("ix_exam_assignments_candidate_email", "exam_assignments", ["candidate_email"])
+    op.create_index("ix_exam_assignments_exam_id", "exam_assignments", ["exam_id"])
+
+    op.drop_index("ix_questions_exam_id", table_name="questions")
+    op.drop_index("ix_ce_user_status", table_name="candidate_exams")
+    op.drop_index("ix_assign_exam_email", table_name="exam_assignments")
@@ -0,0 +1,26 @@
+"""track whether a user's Cognito account has been created
+
+Revision ID: 0007_user_cognito_provisioned
+Revises: 0006_hot_path_indexes
+Create Date: 2026-10-15
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0007_user_cognito_provisioned"
+down_revision = "0006_hot_path_indexes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Existing users either signed in through Cognito or were provisioned
+    # inline by the old assign_exam
+    op.add_column(
+        "users",
+        sa.Column("cognito_provisioned", sa.Boolean(), nullable=False, server_default="true")
+    )
+
+
+def downgrade():
+    op.drop_column("users", "cognito_provisioned")
@@ -0,0 +1,142 @@
+# backend/tests/conftest.py
+#
+# Query-count tests run the real app against a throwaway Postgres:
+#
+#     TEST_DATABASE_URL=postgresql+psycopg2://.../cert_test python -m pytest -q
+#
+# The schema is created and dropped around the session, so never point
+# TEST_DATABASE_URL at a database you care about.
+import os
+
+import pytest
+
+from .helpers import ADMIN_EMAIL, CANDIDATE_EMAIL
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+if TEST_DATABASE_URL:
+    os.environ["DATABASE_URL"] = TEST_DATABASE_URL
+
+# Cognito settings are only read at import time; no AWS calls are made.
+# Redis stays off so counts reflect the Postgres-only path.
+os.environ.setdefault("AWS_REGION", "us-east-1")
+os.environ.setdefault("COGNITO_USER_POOL_ID", "test-pool")
+os.environ.setdefault("COGNITO_CLIENT_ID", "test-client")
+os.environ["REDIS_URL"] = ""
+os.environ["CELERY_BROKER"] = ""
+
+
+@pytest.fixture(scope="session")
+def engine():
+    if not TEST_DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL not set")
+
+    from app import models  # noqa: F401 (registers the tables)
+    from app.db import Base, engine
+
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    yield engine
+    Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture(scope="session")
+def client(engine):
+    from fastapi import Request
+    from fastapi.testclient import TestClient
+
+    from app import main
+    from app.cognito_auth import _is_admin
+
+    # Stand-in for the Cognito JWT: the caller's email comes from a header
+    def fake_current_user(request: Request):
+        email = request.headers["x-test-email"]
+        payload = {"sub": "sub-" + email, "email": email, "email_verified": True}
+        payload["is_admin"] = _is_admin(payload)
+        return payload
+
+    main.app.dependency_overrides[main.get_current_user] = fake_current_user
+
+    with TestClient(main.app) as test_client:
+        yield test_client
+
+    main.app.dependency_overrides.clear()
+
+
+@pytest.fixture(scope="session")
+def seeded(engine):
+    """
+    One admin, a 10-question exam and several candidates: one with the
+    attempt still in progress, the rest completed. Returns the ids the
+    tests need.
+    """
+    from app import models
+    from app.db import SessionLocal
+
+    db = SessionLocal()
+    try:
+        admin = models.User(id="sub-" + ADMIN_EMAIL, email=ADMIN_EMAIL, is_admin=True)
+        db.add(admin)
+        db.flush()
+
+        exam = models.Exam(
+            title="Python Basics",
+            language="python",
+            question_count=10,
+            time_allowed_secs=600,
+            created_by=admin.id
+        )
+        db.add(exam)
+        db.flush()
+
+        questions = [
+            models.Question(
+                text=f"Question {i}?",
+                choices=["a", "b", "c", "d"],
+                answer_index=i % 4,
+                exam_id=exam.id
+            )
+            for i in range(10)
+        ]
+        db.add_all(questions)
+        db.flush()
+
+        question_ids = [q.id for q in questions]
+        answers = {q.id: q.answer_index for q in questions[:5]}
+
+        emails = [CANDIDATE_EMAIL] + [f"done{i}@example.com" for i in range(5)]
+        attempts = {}
+
+        for email in emails:
+            user = models.User(id="sub-" + email, email=email)
+            db.add(user)
+            db.add(models.ExamAssignment(
+                exam_id=exam.id,
+                candidate_email=email,
+                assigned_by=admin.id
+            ))
+
+            in_progress = email == CANDIDATE_EMAIL
+            attempt = models.CandidateExam(
+                user_id=user.id,
+                exam_id=exam.id,
+                question_ids=question_ids,
+                answers=answers,
+                status="in_progress" if in_progress else "completed",
+                time_allowed_secs=exam.time_allowed_secs,
+                time_elapsed=30,
+                score=0 if in_progress else 5
+            )
+            db.add(attempt)
+            db.flush()
+            attempts[email] = attempt.id
+
+        db.commit()
+
+        return {
+            "exam_id": exam.id,
+            "in_progress_id": attempts[CANDIDATE_EMAIL],
+            "completed_id": attempts["done0@example.com"]
+        }
+    finally:
+        db.close()
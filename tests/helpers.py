@@ -0,0 +1,29 @@
+# backend/tests/helpers.py
+import contextlib
+
+from sqlalchemy import event
+
+ADMIN_EMAIL = "admin@nmkglobalinc.com"
+CANDIDATE_EMAIL = "candidate@example.com"
+
+
+@contextlib.contextmanager
+def count_queries(conn):
+    """
+    Collect every SQL statement run on conn (an Engine or Connection)
+    inside the block, e.g. to check an endpoint's query count:
+
+        with count_queries(engine) as queries:
+            client.get("/admin/candidates/results")
+        assert len(queries) <= 2
+    """
+    queries = []
+
+    def listener(conn, cursor, statement, parameters, context, executemany):
+        queries.append(statement)
+
+    event.listen(conn, "before_cursor_execute", listener)
+    try:
+        yield queries
+    finally:
+        event.remove(conn, "before_cursor_execute", listener)
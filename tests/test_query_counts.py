@@ -0,0 +1,52 @@
+# backend/tests/test_query_counts.py
+#
+# Upper bounds on the SQL each hot endpoint runs, so an N+1 or a stray
+# lazy load shows up as a failing test instead of a slow page.
+from .helpers import count_queries, ADMIN_EMAIL, CANDIDATE_EMAIL
+
+ADMIN = {"x-test-email": ADMIN_EMAIL}
+CANDIDATE = {"x-test-email": CANDIDATE_EMAIL}
+
+
+def test_candidate_results_is_one_query(client, engine, seeded):
+    with count_queries(engine) as queries:
+        response = client.get("/admin/candidates/results", headers=ADMIN)
+
+    assert response.status_code == 200
+    assert len(response.json()) == 6
+    assert len(queries) <= 1
+
+
+def test_get_exam_query_count(client, engine, seeded):
+    with count_queries(engine) as queries:
+        response = client.get(f"/exam/{seeded['in_progress_id']}", headers=CANDIDATE)
+
+    assert response.status_code == 200
+    assert len(response.json()["questions"]) == 10
+    # user lookup, attempt, questions
+    assert len(queries) <= 3
+
+
+def test_resume_query_count(client, engine, seeded):
+    with count_queries(engine) as queries:
+        response = client.get("/exam/resume", headers=CANDIDATE)
+
+    assert response.status_code == 200
+    assert len(response.json()["questions"]) == 10
+    assert len(response.json()["answers"]) == 5
+    # user lookup, attempt, questions
+    assert len(queries) <= 3
+
+
+def test_get_result_query_count(client, engine, seeded):
+    headers = {"x-test-email": "done0@example.com"}
+
+    with count_queries(engine) as queries:
+        response = client.get(f"/exam/{seeded['completed_id']}/result", headers=headers)
+
+    assert response.status_code == 200
+    details = response.json()["details"]
+    assert len(details) == 10
+    assert sum(d["is_correct"] for d in details) == 5
+    # user lookup, attempt, questions
+    assert len(queries) <= 3